@@ -1,34 +1,43 @@
 import streamlit as st
 from config import MONTHLY_BUDGET
-from db.conn import seed
-from views.imports import render_imports
+from db.migrations import ensure_schema
+from services.import_jobs import start_worker
+from views.imports import render_import_jobs, render_imports
 from views.stats import render_stats
 from views.add_transaction import render_add_transaction
 from views.recent import render_recent
 from views.filters import sidebar_filters
+from views.diagnostics import render_diagnostics
+
+VIEWS = ["Stats", "Add Transaction", "Recent Transactions", "Import"]
 
 def main():
     st.set_page_config(page_title="Expense Tracker", page_icon="💸", layout="wide")
     st.title("💸 Expense Tracker")
     st.caption("Track your expenses and stay on top of your finances.")
 
-    seed()
+    ensure_schema()
+    # Picks up queued jobs and ones orphaned by a crashed process.
+    start_worker()
 
     start, end, selected_ids = sidebar_filters()
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Stats", "Add Transaction", "Recent Transactions", "Import"])
+    # Unlike st.tabs, only the selected view executes, so its queries and
+    # figures are the only ones paid for on a rerun.
+    view = st.radio("View", VIEWS, horizontal=True, key="active_view", label_visibility="collapsed")
 
-    with tab1:
+    if view == "Stats":
         render_stats(start, end, MONTHLY_BUDGET, selected_ids)
-
-    with tab2:
+    elif view == "Add Transaction":
         render_add_transaction()
-
-    with tab3:
+    elif view == "Recent Transactions":
         render_recent(start, end, selected_ids)
-
-    with tab4:
+    else:
         render_imports()
+        render_import_jobs()
+
+    with st.sidebar.expander("Diagnostics"):
+        render_diagnostics()
 
 if __name__ == "__main__":
     main()
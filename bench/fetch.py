@@ -0,0 +1,77 @@
+"""Compare load_df's row-based and COPY/columnar fetch paths on synthetic data.
+
+Usage: DB_URL=... python -m bench.fetch --rows 1000000 [--reuse] [--out bench_results/fetch.json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from sqlalchemy import text
+from db.conn import get_engine
+from bench.synthetic import populate, reset_schema, use_schema
+
+
+def _measure(fn):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "peak_alloc_mb": round(peak / 2**20, 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        "dtypes": {c: str(t) for c, t in df.dtypes.items()},
+    }
+
+
+def run(rows: int, schema: str, reuse: bool, repeat: int) -> dict:
+    from data.dataframe import _SELECT_SQL, _fetch_columnar, _fetch_rows
+
+    engine = get_engine()
+    use_schema(engine, schema)
+    if not reuse:
+        reset_schema(engine, schema)
+        populate(engine, rows)
+
+    stmt = text(f"{_SELECT_SQL} ORDER BY t.id DESC LIMIT :lim")
+    params = {"lim": rows}
+    results = {}
+    for label, fetch in (("rows", _fetch_rows), ("columnar", _fetch_columnar)):
+        runs = []
+        for _ in range(repeat):
+            with engine.connect() as conn:
+                runs.append(_measure(lambda: fetch(conn, stmt, dict(params))))
+        best = min(runs, key=lambda r: r["seconds"])
+        results[label] = best
+        print(f"{label:<9} {best['rows']:>9,} rows  {best['seconds']:>7.3f}s  "
+              f"peak {best['peak_alloc_mb']:>8.1f} MB  frame {best['frame_mb']:>8.1f} MB", file=sys.stderr)
+
+    return {"rows": rows, "repeat": repeat, "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--schema", default="bench")
+    parser.add_argument("--reuse", action="store_true", help="Keep the existing synthetic data.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_results/fetch.json")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.schema, args.reuse, args.repeat)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Compare date-filtered queries on a plain vs a monthly-partitioned transactions table.
+
+Usage: DB_URL=... python -m bench.partitions --years 1 3 10 [--rows-per-year 500000] [--out bench_results/partitions.json]
+
+For each history length the same synthetic data is measured first as a plain
+heap and then after ``manage.py partitions convert``. The query window is
+fixed (one month, one quarter), so on the partitioned layout time should track
+the partitions touched rather than the years of history.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from db.conn import get_engine
+from db.partitions import convert_to_partitioned
+from bench.plans import _capture, _is_read, _walk
+from bench.synthetic import populate, reset_schema, use_schema
+
+
+def _cases(today: date):
+    from data.dataframe import load_df, load_page
+    from data.exports import iter_export_batches
+
+    month_start = today.replace(day=1)
+    quarter_start = month_start - relativedelta(months=2)
+    load, page = load_df.__wrapped__, load_page.__wrapped__
+
+    def export_quarter():
+        for _ in iter_export_batches(quarter_start, today):
+            pass
+
+    return [
+        ("load_df month", lambda: load(month_start, today)),
+        ("load_page quarter", lambda: page(quarter_start, today)),
+        ("load_page quarter, page 2", lambda: page(quarter_start, today, cursor=(str(month_start), 0))),
+        ("export quarter", export_quarter),
+    ]
+
+
+def _partitions_touched(engine, fn) -> int:
+    touched = set()
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for statement, parameters in _capture(engine, fn):
+            if not _is_read(statement):
+                continue
+            cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters)
+            plan = cur.fetchone()[0][0]
+            touched |= {
+                n["Relation Name"] for n in _walk(plan["Plan"])
+                if n.get("Relation Name", "").startswith("transactions") and n.get("Actual Loops", 0) > 0
+            }
+        raw.rollback()
+    finally:
+        raw.close()
+    return len(touched)
+
+
+def _measure(engine, layout: str, years: int, repeat: int):
+    results = []
+    for label, fn in _cases(date.today()):
+        fn()
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+        entry = {
+            "layout": layout,
+            "years": years,
+            "case": label,
+            "median_s": round(statistics.median(times), 4),
+            "relations": _partitions_touched(engine, fn),
+        }
+        print(f"  {layout:<12} {label:<28} {entry['median_s']:>9.4f}s  {entry['relations']:>3} relation(s)", file=sys.stderr)
+        results.append(entry)
+    return results
+
+
+def run(args) -> dict:
+    engine = get_engine()
+    use_schema(engine, args.schema)
+    results = []
+    for years in args.years:
+        rows = args.rows_per_year * years
+        print(f"{years} year(s), {rows:,} rows", file=sys.stderr)
+        reset_schema(engine, args.schema)
+        populate(engine, rows, years=years)
+        results += _measure(engine, "plain", years, args.repeat)
+
+        convert_to_partitioned(engine)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE transactions"))
+        results += _measure(engine, "partitioned", years, args.repeat)
+
+    return {
+        "params": {k: getattr(args, k) for k in ("years", "rows_per_year", "repeat")},
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--rows-per-year", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--schema", default="bench_partitions")
+    parser.add_argument("--out", default="bench_results/partitions.json")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
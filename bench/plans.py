@@ -0,0 +1,151 @@
+"""EXPLAIN (ANALYZE, BUFFERS) every hot data-layer query against synthetic data.
+
+Usage: DB_URL=... python -m bench.plans --rows 2000000 [--reuse] [--out bench_results/plans.json]
+
+The data lives in its own schema (default ``bench``), which is dropped and
+recreated unless ``--reuse`` is given.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import event
+from db.conn import get_engine
+from bench.synthetic import populate, reset_schema, use_schema
+
+SEQ_SCAN_TABLES = {"transactions", "daily_totals"}
+READ_PREFIXES = ("SELECT", "WITH")
+
+
+def _is_read(statement: str) -> bool:
+    return statement.lstrip().upper().startswith(READ_PREFIXES)
+
+
+def _queries(today: date):
+    from data.dataframe import load_df, load_page
+    from data.exports import iter_export_batches
+    from data.search import search_transactions
+    from repos.aggregates_repo import expenses_by_category, expenses_by_period
+    from repos.transactions_repo import count_transactions_between, sum_expenses_between, summarize_between
+
+    month_start = today.replace(day=1)
+    month_end = month_start + relativedelta(months=1, days=-1)
+    year_start = today - relativedelta(years=1)
+    cids = (1, 2, 3)
+
+    def first_export_batch():
+        batches = iter_export_batches(month_start, month_end)
+        next(batches, None)
+        batches.close()
+
+    # Bypass range_cached: a warm (or shared) cache would run no SQL at all.
+    load, page = load_df.__wrapped__, load_page.__wrapped__
+
+    return [
+        ("load_df month", lambda: load(month_start, month_end)),
+        ("load_df year + categories", lambda: load(year_start, today, cids)),
+        ("load_page first", lambda: page(year_start, today, cids)),
+        ("load_page deep", lambda: page(year_start, today, cids, cursor=(str(year_start + relativedelta(months=2)), 0))),
+        ("sum_expenses_between month", lambda: sum_expenses_between(month_start, month_end)),
+        ("count_transactions_between year", lambda: count_transactions_between(year_start, today, cids)),
+        ("summarize_between month", lambda: summarize_between(month_start, today, month_start, month_end, cids)),
+        ("expenses_by_category year", lambda: expenses_by_category(year_start, today)),
+        ("expenses_by_period year/week", lambda: expenses_by_period(year_start, today, grain="week")),
+        ("export first batch", first_export_batch),
+        ("search word", lambda: search_transactions.__wrapped__("Purchase 42")),
+        ("search typo + year", lambda: search_transactions.__wrapped__("Purchse", year_start, today)),
+    ]
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _capture(engine, fn):
+    captured = []
+
+    def _listener(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _listener)
+    if not captured:
+        raise RuntimeError(f"no statements captured from {getattr(fn, '__name__', fn)!r}")
+    return captured
+
+
+def _explain(engine, statement, parameters):
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+        plan = cur.fetchone()[0][0]
+        raw.rollback()
+    finally:
+        raw.close()
+
+    nodes = list(_walk(plan["Plan"]))
+    seq_scans = sorted({
+        n["Relation Name"] for n in nodes
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in SEQ_SCAN_TABLES
+    })
+    return {
+        "execution_ms": plan["Execution Time"],
+        "planning_ms": plan["Planning Time"],
+        "shared_hit_blocks": plan["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read_blocks": plan["Plan"].get("Shared Read Blocks", 0),
+        "seq_scans": seq_scans,
+        "node_types": sorted({n["Node Type"] for n in nodes}),
+    }
+
+
+def run(rows: int, schema: str, reuse: bool) -> dict:
+    engine = get_engine()
+    use_schema(engine, schema)
+    if not reuse:
+        t0 = time.perf_counter()
+        reset_schema(engine, schema)
+        populate(engine, rows)
+        print(f"populated {rows:,} rows in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    results = []
+    for label, fn in _queries(date.today()):
+        reads = [(st, p) for st, p in _capture(engine, fn) if _is_read(st)]
+        if not reads:
+            raise RuntimeError(f"{label}: no SELECT/WITH statement captured")
+        for statement, parameters in reads:
+            entry = {"query": label, **_explain(engine, statement, parameters)}
+            flag = "  SEQ SCAN: " + ", ".join(entry["seq_scans"]) if entry["seq_scans"] else ""
+            print(f"{label:<36} {entry['execution_ms']:>10.2f} ms{flag}", file=sys.stderr)
+            results.append(entry)
+
+    return {"rows": rows, "schema": schema, "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "queries": results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--schema", default="bench")
+    parser.add_argument("--reuse", action="store_true", help="Keep the existing synthetic data.")
+    parser.add_argument("--out", default="bench_results/plans.json")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.schema, args.reuse)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.out}", file=sys.stderr)
+    return 1 if any(q["seq_scans"] for q in report["queries"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
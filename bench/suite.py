@@ -0,0 +1,173 @@
+"""Time the data layer, import path and exports on seeded synthetic data.
+
+Usage: DB_URL=... python -m bench.suite [--sizes 10000 100000 1000000]
+                                        [--baseline bench_results/suite-<sha>.json]
+
+Each size gets a fresh schema (default ``bench``) filled by the seeded
+generator, so runs on different commits are comparable. Results are
+written to bench_results/suite-<git sha>.json; with --baseline, cases
+that got slower than --threshold percent are reported and the exit code
+is non-zero.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from db.conn import get_engine
+from bench.synthetic import generate_frame, populate, reset_schema, use_schema
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _time(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _cases(size: int, args):
+    from data.dataframe import load_df
+    from data.exports import write_csv, write_xlsx
+    from repos.transactions_repo import count_transactions_between, sum_expenses_between
+
+    today = date.today()
+    month_start = today.replace(day=1)
+    year_start = today - relativedelta(years=1)
+    all_start = today - relativedelta(years=args.years)
+    load = load_df.__wrapped__
+    out_dir = tempfile.mkdtemp(prefix="bench_export_")
+
+    cases = [
+        ("load_df month (columnar)", lambda: load(month_start, today)),
+        ("load_df month (rows)", lambda: load(month_start, today, columnar=False)),
+        ("load_df all, limit=size (columnar)", lambda: load(all_start, today, limit=size)),
+        ("load_df all, limit=size (rows)", lambda: load(all_start, today, limit=size, columnar=False)),
+        ("sum_expenses_between year", lambda: sum_expenses_between(year_start, today)),
+        ("count_transactions_between year", lambda: count_transactions_between(year_start, today)),
+        ("export csv month", lambda: write_csv(os.path.join(out_dir, "m.csv"), month_start, today, max_rows=None)),
+        ("export csv all", lambda: write_csv(os.path.join(out_dir, "a.csv"), all_start, today, max_rows=None)),
+    ]
+    if size <= args.max_xlsx_rows:
+        cases.append(("export xlsx all", lambda: write_xlsx(os.path.join(out_dir, "a.xlsx"), all_start, today, max_rows=None)))
+    return cases
+
+
+def _bench_import(size: int, args) -> float:
+    from repos.categories_repo import bump_registry_version
+    from services.imports import import_rows
+
+    frame = generate_frame(size, args.categories, args.accounts, args.years, seed=args.seed + 1)
+    bump_registry_version()
+    t0 = time.perf_counter()
+    imported, _, _ = import_rows(frame, create_missing_categories=True)
+    elapsed = time.perf_counter() - t0
+    if imported != size:
+        print(f"  warning: import_rows imported {imported} of {size} rows", file=sys.stderr)
+    return elapsed
+
+
+def run(args) -> dict:
+    from repos.categories_repo import bump_registry_version
+
+    engine = get_engine()
+    use_schema(engine, args.schema)
+    results = []
+
+    for size in args.sizes:
+        reset_schema(engine, args.schema)
+        bump_registry_version()
+        t0 = time.perf_counter()
+        # Postgres setseed() only takes [-1, 1]; the default 42 still maps to 0.42.
+        populate(engine, size, args.categories, args.accounts, args.years, seed=(args.seed % 100) / 100)
+        print(f"[{size:,} rows] populated in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+        for name, fn in _cases(size, args):
+            times = _time(fn, args.repeat)
+            results.append({
+                "size": size,
+                "case": name,
+                "min_s": round(min(times), 5),
+                "median_s": round(statistics.median(times), 5),
+            })
+            print(f"  {name:<40} {min(times):>9.4f}s", file=sys.stderr)
+
+        elapsed = _bench_import(size, args)
+        results.append({
+            "size": size,
+            "case": "import_rows",
+            "min_s": round(elapsed, 5),
+            "median_s": round(elapsed, 5),
+            "rows_per_s": round(size / elapsed) if elapsed else None,
+        })
+        print(f"  {'import_rows':<40} {elapsed:>9.4f}s  ({size / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+    return {
+        "commit": _git_sha(),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: getattr(args, k) for k in ("sizes", "categories", "accounts", "years", "seed", "repeat")},
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline_path: str, threshold_pct: float) -> list:
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {(r["size"], r["case"]): r for r in json.load(fh)["results"]}
+    regressions = []
+    for r in report["results"]:
+        base = baseline.get((r["size"], r["case"]))
+        if not base or not base["min_s"]:
+            continue
+        change = (r["min_s"] - base["min_s"]) / base["min_s"] * 100
+        if change > threshold_pct:
+            regressions.append({**r, "baseline_min_s": base["min_s"], "change_pct": round(change, 1)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-xlsx-rows", type=int, default=100_000, help="Skip the xlsx export above this size.")
+    parser.add_argument("--schema", default="bench")
+    parser.add_argument("--out", default=None, help="Defaults to bench_results/suite-<git sha>.json")
+    parser.add_argument("--baseline", default=None, help="Earlier suite JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Regression threshold in percent.")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    out = args.out or os.path.join("bench_results", f"suite-{report['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {out}", file=sys.stderr)
+
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION [{r['size']:,}] {r['case']}: {r['baseline_min_s']}s -> {r['min_s']}s (+{r['change_pct']}%)", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+from datetime import date
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from db.migrations import migrate
+from repos.rollups_repo import rebuild_account_ledger, rebuild_daily_totals
+
+
+def use_schema(engine: Engine, schema: str) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_search_path(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        # public stays on the path for extensions such as pg_trgm.
+        cur.execute(f'SET search_path TO "{schema}", public')
+        cur.close()
+        dbapi_conn.commit()
+
+
+def reset_schema(engine: Engine, schema: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    engine.dispose()
+    migrate(engine)
+
+
+def populate(
+    engine: Engine,
+    rows: int,
+    categories: int = 20,
+    accounts: int = 4,
+    years: int = 3,
+    seed: float = 0.42,
+    end_date: date | None = None,
+) -> None:
+    end_date = end_date or date.today()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT setseed(:s)"), {"s": seed})
+        conn.execute(text("""
+            INSERT INTO categories (name, kind)
+            SELECT 'Category ' || g, CASE WHEN g % 5 = 0 THEN 'income' ELSE 'expense' END
+            FROM generate_series(1, :m) g
+            ON CONFLICT (name, kind) DO NOTHING
+        """), {"m": int(categories)})
+        conn.execute(text("""
+            INSERT INTO transactions (tx_date, description, amount, category_id, account)
+            SELECT
+                CAST(:end_date AS date) - floor(random() * :days)::int,
+                'Purchase #' || floor(random() * 5000)::int,
+                round((random() * 250)::numeric, 2),
+                c.ids[1 + floor(random() * array_length(c.ids, 1))::int],
+                'Account ' || (1 + floor(random() * :accounts)::int)
+            FROM generate_series(1, :n), (SELECT array_agg(id ORDER BY id) AS ids FROM categories) c
+        """), {"end_date": str(end_date), "days": 365 * int(years), "accounts": int(accounts), "n": int(rows)})
+    rebuild_daily_totals(engine)
+    rebuild_account_ledger(engine)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("categories", "transactions", "daily_totals", "account_monthly"):
+            conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+def generate_frame(
+    rows: int,
+    categories: int = 20,
+    accounts: int = 4,
+    years: int = 3,
+    seed: int = 42,
+    end_date: date | None = None,
+):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end_date or date.today())
+    cat_no = rng.integers(1, categories + 1, rows)
+    return pd.DataFrame({
+        "tx_date": end - pd.to_timedelta(rng.integers(0, 365 * years, rows), unit="D"),
+        "description": pd.Series(rng.integers(0, 5000, rows)).map("Purchase #{}".format),
+        "amount": np.round(rng.uniform(0.01, 250, rows), 2),
+        "category": pd.Series(cat_no).map("Category {}".format),
+        "kind": np.where(cat_no % 5 == 0, "income", "expense"),
+        "account": pd.Series(rng.integers(1, accounts + 1, rows)).map("Account {}".format),
+    })
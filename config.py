@@ -1 +1,7 @@
-MONTHLY_BUDGET = 1000.00
\ No newline at end of file
+MONTHLY_BUDGET = 1000.00
+IMPORT_CHUNK_SIZE = 5000
+STREAM_CHUNK_ROWS = 50000
+STREAM_THRESHOLD_BYTES = 20 * 1024 * 1024
+IMPORT_JOB_POLL_SECONDS = 1.0
+IMPORT_JOB_STALE_SECONDS = 120
+PARTITION_CHECK_SECONDS = 3600
@@ -0,0 +1,27 @@
+import logging
+import pandas as pd
+from data import snapshot
+from repos.aggregates_repo import expenses_by_category, expenses_by_period
+from utils.cache import range_cached
+
+logger = logging.getLogger("exp_tracker.snapshot")
+
+def _from_snapshot(fn, *args):
+    if not snapshot.use_snapshot():
+        return None
+    try:
+        return fn(*args)
+    except Exception:
+        # e.g. a part file removed under us by another process's refresh.
+        logger.warning("snapshot read failed, falling back to Postgres", exc_info=True)
+        return None
+
+@range_cached(ttl=30)
+def load_category_totals(start=None, end=None, category_ids=None) -> pd.DataFrame:
+    df = _from_snapshot(snapshot.expenses_by_category, start, end, category_ids)
+    return df if df is not None else expenses_by_category(start, end, category_ids)
+
+@range_cached(ttl=30)
+def load_period_totals(start=None, end=None, category_ids=None, grain: str = "week") -> pd.DataFrame:
+    df = _from_snapshot(snapshot.expenses_by_period, start, end, category_ids, grain)
+    return df if df is not None else expenses_by_period(start, end, category_ids, grain)
@@ -1,8 +1,10 @@
+import io
 import pandas as pd
-import streamlit as st
 from typing import Optional, Sequence, Dict, Any, Tuple, List
 from sqlalchemy import text, bindparam
+from sqlalchemy.engine import Connection
 from db.conn import get_engine
+from utils.cache import range_cached
 
 def _build_filters(
     start: Optional[str] = None,
@@ -27,11 +29,7 @@ def _build_filters(
     where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
     return where_sql, params, bindparams
 
-@st.cache_data(ttl=30)
-def load_df(start=None, end=None, category_ids=None, limit: int = 200) -> pd.DataFrame:
-    where_sql, params, bindparams = _build_filters(start, end, category_ids)
-
-    sql = f"""
+_SELECT_SQL = """
         SELECT
             t.id,
             t.tx_date,
@@ -44,6 +42,75 @@ def load_df(start=None, end=None, category_ids=None, limit: int = 200) -> pd.Dat
             c.kind AS category_kind
         FROM transactions t
         LEFT JOIN categories c ON c.id = t.category_id
+"""
+
+_COLUMN_DTYPES = {
+    "id": "int64",
+    "description": "string",
+    "amount": "float64",
+    "category_id": "Int64",
+    "account": "category",
+    "category": "category",
+    "category_kind": "category",
+}
+
+def _to_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["tx_date"] = pd.to_datetime(df["tx_date"], errors="coerce")
+    return df
+
+def _fetch_rows(conn: Connection, stmt, params: Dict[str, Any]) -> pd.DataFrame:
+    return _to_frame(conn.execute(stmt, params).mappings().all())
+
+def _fetch_columnar(conn: Connection, stmt, params: Dict[str, Any]) -> pd.DataFrame:
+    # COPY the result set out as CSV and parse it straight into typed columns,
+    # skipping the per-row RowMapping/Decimal objects of the regular path.
+    compiled = stmt.bindparams(**params).compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    statement, parameters = compiled.string, compiled.params
+    cur = conn.connection.cursor()
+    try:
+        sql = cur.mogrify(statement, parameters)
+        buf = io.BytesIO()
+        # COPY bypasses SQLAlchemy's execution path, so fire the cursor events
+        # by hand with the inner SELECT: query stats and plan capture then see
+        # this path like any other read.
+        conn.dispatch.before_cursor_execute(conn, cur, statement, parameters, None, False)
+        try:
+            cur.copy_expert(b"COPY (" + sql + b") TO STDOUT WITH (FORMAT csv, HEADER)", buf)
+        finally:
+            conn.dispatch.after_cursor_execute(conn, cur, statement, parameters, None, False)
+    finally:
+        cur.close()
+
+    buf.seek(0)
+    nullable = ["category_id", "category", "category_kind"]
+    df = pd.read_csv(
+        buf,
+        dtype=_COLUMN_DTYPES,
+        keep_default_na=False,
+        na_values={c: [""] for c in nullable},
+    )
+    df["tx_date"] = pd.to_datetime(df["tx_date"], format="%Y-%m-%d", errors="coerce")
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True, errors="coerce")
+    return df
+
+def _supports_copy(conn: Connection) -> bool:
+    return conn.dialect.driver == "psycopg2"
+
+def _fetch_frame(conn: Connection, stmt, params: Dict[str, Any]) -> pd.DataFrame:
+    if _supports_copy(conn):
+        return _fetch_columnar(conn, stmt, params)
+    return _fetch_rows(conn, stmt, params)
+
+@range_cached(ttl=30)
+def load_df(start=None, end=None, category_ids=None, limit: int = 200, columnar: bool = True) -> pd.DataFrame:
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+
+    sql = f"""
+        {_SELECT_SQL}
         {where_sql}
         ORDER BY t.id DESC
         LIMIT :lim
@@ -52,9 +119,70 @@ def load_df(start=None, end=None, category_ids=None, limit: int = 200) -> pd.Dat
     stmt = text(sql).bindparams(*bindparams)
 
     with get_engine().connect() as conn:
-        rows = conn.execute(stmt, params).mappings().all()
+        if columnar and _supports_copy(conn):
+            return _fetch_columnar(conn, stmt, params)
+        return _fetch_rows(conn, stmt, params)
 
-    df = pd.DataFrame(rows)
+@range_cached(ttl=30)
+def load_page(
+    start=None,
+    end=None,
+    category_ids=None,
+    cursor: Optional[Tuple[str, int]] = None,
+    direction: str = "next",
+    page_size: int = 50,
+) -> Dict[str, Any]:
+    if direction not in ("next", "prev"):
+        raise ValueError(f"Unsupported direction: {direction!r}")
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+
+    if cursor is not None:
+        op = "<" if direction == "next" else ">"
+        # The plain tx_date bound is implied by the row comparison but lets the
+        # planner prune partitions, which it cannot do from the row comparison.
+        keyset = (
+            f"t.tx_date {op}= CAST(:cur_date AS date) "
+            f"AND (t.tx_date, t.id) {op} (CAST(:cur_date AS date), :cur_id)"
+        )
+        where_sql = f"{where_sql} AND {keyset}" if where_sql else f"WHERE {keyset}"
+        params["cur_date"], params["cur_id"] = str(cursor[0]), int(cursor[1])
+
+    order = "DESC" if direction == "next" else "ASC"
+    sql = f"""
+        {_SELECT_SQL}
+        {where_sql}
+        ORDER BY t.tx_date {order}, t.id {order}
+        LIMIT :lim
+    """
+    params["lim"] = int(page_size) + 1
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        df = _fetch_frame(conn, stmt, params)
+
+    has_more = len(df) > page_size
+    df = df.iloc[:page_size]
+    if direction == "prev":
+        df = df.iloc[::-1]
+    df = df.reset_index(drop=True)
+
+    def _key(pos: int) -> Tuple[str, int]:
+        return df["tx_date"].iloc[pos].date().isoformat(), int(df["id"].iloc[pos])
+
+    next_cursor = prev_cursor = None
     if not df.empty:
-        df["tx_date"] = pd.to_datetime(df["tx_date"], errors="coerce")
-    return df
+        if has_more or (direction == "prev" and cursor is not None):
+            next_cursor = _key(-1)
+        if (direction == "next" and cursor is not None) or (direction == "prev" and has_more):
+            prev_cursor = _key(0)
+
+    return {"rows": df, "next": next_cursor, "prev": prev_cursor}
+
+@range_cached(ttl=30)
+def estimate_count(start=None, end=None, category_ids=None) -> int:
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+    stmt = text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM transactions t {where_sql}").bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        plan = conn.execute(stmt, params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,71 @@
+import csv
+import os
+from typing import Iterator, List, Optional, Sequence
+from sqlalchemy import text
+from db.conn import get_engine
+from data.dataframe import _build_filters
+
+EXPORT_HEADER = ["Date", "Description", "Amount", "Category", "Account", "Type"]
+# st.download_button keeps the whole file in Streamlit's in-memory media store
+# for the session, so exports built for it are capped.
+EXPORT_MAX_ROWS = int(os.getenv("EXPORT_MAX_ROWS", "200000"))
+
+def iter_export_batches(
+    start=None, end=None, category_ids=None, batch_size: int = 10_000, limit: Optional[int] = None
+) -> Iterator[List[Sequence]]:
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT :lim"
+        params["lim"] = int(limit)
+    sql = f"""
+        SELECT t.tx_date, t.description, t.amount, c.name, t.account, c.kind
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        {where_sql}
+        ORDER BY t.tx_date DESC, t.id DESC
+        {limit_sql}
+    """
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        with conn.begin():
+            result = conn.execution_options(yield_per=int(batch_size)).execute(stmt, params)
+            for batch in result.partitions():
+                yield batch
+
+def _capped_batches(start, end, category_ids, max_rows: Optional[int]) -> Iterator[List[Sequence]]:
+    if max_rows is None:
+        yield from iter_export_batches(start, end, category_ids)
+        return
+    written = 0
+    for batch in iter_export_batches(start, end, category_ids, limit=max_rows + 1):
+        written += len(batch)
+        if written > max_rows:
+            raise ValueError(f"exports are limited to {max_rows:,} rows; narrow the dates or categories")
+        yield batch
+
+def write_csv(path: str, start=None, end=None, category_ids=None, max_rows: Optional[int] = EXPORT_MAX_ROWS) -> int:
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(EXPORT_HEADER)
+        for batch in _capped_batches(start, end, category_ids, max_rows):
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+def write_xlsx(path: str, start=None, end=None, category_ids=None, max_rows: Optional[int] = EXPORT_MAX_ROWS) -> int:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Transactions")
+    ws.append(EXPORT_HEADER)
+    written = 0
+    for batch in _capped_batches(start, end, category_ids, max_rows):
+        for row in batch:
+            ws.append(list(row))
+        written += len(batch)
+    wb.save(path)
+    return written
@@ -0,0 +1,38 @@
+import pandas as pd
+from sqlalchemy import text
+from db.conn import get_engine
+from data.dataframe import _SELECT_SQL, _build_filters, _fetch_frame, _to_frame
+from utils.cache import range_cached
+
+# Whole-word matches come from the tsvector index, typos and partial words from
+# the trigram index; the planner ORs the two bitmap scans.
+_MATCH = "(t.description_tsv @@ q.tsq OR :q <% t.description)"
+
+
+@range_cached(ttl=30)
+def search_transactions(query: str, start=None, end=None, category_ids=None, limit: int = 50) -> pd.DataFrame:
+    query = (query or "").strip()
+    if not query:
+        return _to_frame([])
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+    where_sql = f"{where_sql} AND {_MATCH}" if where_sql else f"WHERE {_MATCH}"
+
+    sql = f"""
+        WITH q AS (SELECT websearch_to_tsquery('simple', :q) AS tsq),
+        hits AS (
+            SELECT t.id, t.tx_date,
+                   ts_rank_cd(t.description_tsv, q.tsq) + word_similarity(:q, t.description) AS score
+            FROM transactions t, q
+            {where_sql}
+            ORDER BY score DESC, t.tx_date DESC, t.id DESC
+            LIMIT :lim
+        )
+        {_SELECT_SQL}
+        JOIN hits h ON h.id = t.id AND h.tx_date = t.tx_date
+        ORDER BY h.score DESC, t.tx_date DESC, t.id DESC
+    """
+    params.update(q=query, lim=int(limit))
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        return _fetch_frame(conn, stmt, params)
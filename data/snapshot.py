@@ -0,0 +1,271 @@
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+from sqlalchemy import text
+from db.conn import get_engine
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+ANALYTICS_MODE = os.getenv("ANALYTICS_MODE", "postgres").lower()
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or os.path.join(tempfile.gettempdir(), "exp_tracker_snapshot")
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "3600"))
+MAX_PARTS = 32
+# Replaced parquet files are kept this long so readers (in this or another
+# process) that loaded the previous meta can finish their query.
+RETIRE_GRACE_S = 600
+WATERMARK_TTL_S = 5
+
+logger = logging.getLogger("exp_tracker.snapshot")
+
+_refresh_lock = threading.Lock()
+_schedule_lock = threading.Lock()
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+_scheduled: Optional[Future] = None
+_watermark_lock = threading.Lock()
+_watermark: Optional[Tuple[float, Tuple[int, int]]] = None
+
+_SNAPSHOT_SQL = """
+    SELECT t.id, t.tx_date, t.amount, t.category_id, c.name AS category, c.kind, t.account
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    WHERE t.id > :wm
+    ORDER BY t.id
+"""
+
+
+def _meta_path() -> str:
+    return os.path.join(SNAPSHOT_DIR, "snapshot.json")
+
+
+def _read_meta() -> Optional[Dict[str, Any]]:
+    try:
+        with open(_meta_path(), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(meta: Dict[str, Any]) -> None:
+    tmp = _meta_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, _meta_path())
+
+
+def _db_watermark() -> Tuple[int, int]:
+    # Every writer bumps one of these, whichever process it runs in, so the
+    # snapshot is fresh exactly when both match what it was built from. The
+    # SUM scans daily_totals, so the answer is shared for WATERMARK_TTL_S.
+    global _watermark
+    with _watermark_lock:
+        cached = _watermark
+    if cached is not None and time.monotonic() - cached[0] < WATERMARK_TTL_S:
+        return cached[1]
+
+    checked_at = time.monotonic()
+    with get_engine().connect() as conn:
+        max_id, rows = conn.execute(text("""
+            SELECT (SELECT COALESCE(max(id), 0) FROM transactions),
+                   (SELECT COALESCE(SUM(n), 0) FROM daily_totals)
+        """)).one()
+    with _watermark_lock:
+        _watermark = (checked_at, (int(max_id), int(rows)))
+    return int(max_id), int(rows)
+
+
+@contextmanager
+def _file_lock(blocking: bool = True):
+    # Serialises refreshes across processes sharing SNAPSHOT_DIR; yields False
+    # when non-blocking and another process holds it.
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(os.path.join(SNAPSHOT_DIR, ".lock"), "w") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _write_part(con, batch: pd.DataFrame, path: str) -> None:
+    batch = batch.assign(
+        tx_date=pd.to_datetime(batch["tx_date"]),
+        amount=batch["amount"].astype("float64"),
+        category_id=batch["category_id"].astype("Int64"),
+    )
+    con.register("batch", batch)
+    try:
+        con.execute(f"""
+            COPY (
+                SELECT id, CAST(tx_date AS DATE) AS tx_date, amount, category_id, category, kind, account
+                FROM batch
+            ) TO '{path}' (FORMAT parquet)
+        """)
+    finally:
+        con.unregister("batch")
+
+
+def _compact(con, parts: List[str], watermark: int) -> List[str]:
+    path = os.path.join(SNAPSHOT_DIR, f"compact-{watermark}-{int(time.time())}.parquet")
+    con.execute(f"COPY (SELECT * FROM read_parquet({parts!r}) ORDER BY id) TO '{path}' (FORMAT parquet)")
+    return [path]
+
+
+def _append(meta: Dict[str, Any], batch_size: int) -> Optional[Dict[str, Any]]:
+    meta = dict(meta)
+    stamp = int(time.time() * 1000)
+    con = duckdb.connect()
+    new_parts = []
+    try:
+        with get_engine().connect() as conn:
+            with conn.begin():
+                conn.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+                expected_rows = int(conn.execute(text("SELECT COALESCE(SUM(n), 0) FROM daily_totals")).scalar())
+                result = conn.execution_options(yield_per=batch_size).execute(
+                    text(_SNAPSHOT_SQL), {"wm": meta["watermark"]}
+                )
+                for batch in result.partitions():
+                    df = pd.DataFrame(batch, columns=list(result.keys()))
+                    path = os.path.join(SNAPSHOT_DIR, f"part-{stamp}-{int(df['id'].iloc[0])}.parquet")
+                    _write_part(con, df, path)
+                    new_parts.append(path)
+                    meta["watermark"] = int(df["id"].iloc[-1])
+                    meta["rows"] += len(df)
+
+        if meta["rows"] != expected_rows:
+            # An id below the watermark committed late, or rows were removed:
+            # appending can't repair that, the caller has to rebuild.
+            for path in new_parts:
+                os.remove(path)
+            return None
+
+        meta["parts"] = meta["parts"] + new_parts
+        if len(meta["parts"]) > MAX_PARTS:
+            meta["parts"] = _compact(con, meta["parts"], meta["watermark"])
+    finally:
+        con.close()
+
+    meta["refreshed_at"] = time.time()
+    return meta
+
+
+def _refresh(rebuild: bool, batch_size: int) -> Dict[str, Any]:
+    empty = {"watermark": 0, "rows": 0, "parts": [], "retired": []}
+    stored = _read_meta()
+    old = dict(empty, **(stored or {}))
+    meta = None if rebuild or stored is None else _append(old, batch_size)
+    if meta is None:
+        meta = _append(dict(empty, retired=old["retired"]), batch_size)
+    if meta is None:
+        raise RuntimeError("Snapshot row count does not match daily_totals; run 'manage.py rollups verify'.")
+
+    now = time.time()
+    replaced = set(old["parts"]) - set(meta["parts"])
+    retired = [r for r in meta.get("retired", []) if r[0] not in meta["parts"]] + [[p, now] for p in replaced]
+    meta["retired"] = []
+    for path, since in retired:
+        if now - since < RETIRE_GRACE_S:
+            meta["retired"].append([path, since])
+        elif os.path.exists(path):
+            os.remove(path)
+    _write_meta(meta)
+    return meta
+
+
+def refresh_snapshot(rebuild: bool = False, batch_size: int = 200_000, blocking: bool = True) -> Optional[Dict[str, Any]]:
+    if duckdb is None:
+        raise RuntimeError("Analytics snapshots need the 'duckdb' package.")
+    if not _refresh_lock.acquire(blocking=blocking):
+        return None
+    try:
+        with _file_lock(blocking) as locked:
+            if not locked:
+                return None
+            return _refresh(rebuild, batch_size)
+    finally:
+        _refresh_lock.release()
+
+
+def schedule_refresh() -> None:
+    # Refreshes run on their own thread, not the shared query executor, so a
+    # long rebuild never holds workers that sessions' chart loads need.
+    global _scheduled
+    if duckdb is None:
+        return
+    with _schedule_lock:
+        if _scheduled is not None and not _scheduled.done():
+            return
+        _scheduled = _refresher.submit(refresh_snapshot, blocking=False)
+
+
+def snapshot_status() -> Dict[str, Any]:
+    meta = _read_meta()
+    if meta is None:
+        return {"available": False, "fresh": False}
+    age = time.time() - meta.get("refreshed_at", 0)
+    fresh = _db_watermark() == (meta["watermark"], meta["rows"]) and age <= SNAPSHOT_MAX_AGE
+    return {"available": True, "fresh": fresh, "age_s": round(age, 1), "rows": meta["rows"], "watermark": meta["watermark"]}
+
+
+def use_snapshot() -> bool:
+    if ANALYTICS_MODE != "snapshot" or duckdb is None:
+        return False
+    status = snapshot_status()
+    if not status["fresh"]:
+        schedule_refresh()
+    return status["fresh"]
+
+
+def _query(sql_select: str, start, end, category_ids: Optional[Sequence[int]], tail: str, columns: List[str]) -> pd.DataFrame:
+    meta = _read_meta()
+    if not meta["parts"]:
+        return pd.DataFrame(columns=columns)
+    clauses, params = ["kind = 'expense'"], [meta["parts"]]
+    if start is not None:
+        clauses.append("tx_date >= CAST(? AS DATE)")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("tx_date <= CAST(? AS DATE)")
+        params.append(str(end))
+    if category_ids:
+        clauses.append("list_contains(CAST(? AS INTEGER[]), category_id)")
+        params.append([int(c) for c in category_ids])
+
+    sql = f"{sql_select} FROM read_parquet(?) WHERE {' AND '.join(clauses)} {tail}"
+    con = duckdb.connect()
+    try:
+        return con.execute(sql, params).df()
+    finally:
+        con.close()
+
+
+def expenses_by_category(start=None, end=None, category_ids=None) -> pd.DataFrame:
+    return _query(
+        "SELECT category, SUM(amount) AS amount", start, end, category_ids,
+        "GROUP BY category_id, category ORDER BY amount DESC", ["category", "amount"],
+    )
+
+
+def expenses_by_period(start=None, end=None, category_ids=None, grain: str = "week") -> pd.DataFrame:
+    if grain not in ("day", "week", "month"):
+        raise ValueError(f"Unsupported grain: {grain!r}")
+    df = _query(
+        f"SELECT CAST(date_trunc('{grain}', tx_date) AS DATE) AS period, SUM(amount) AS amount",
+        start, end, category_ids, "GROUP BY 1 ORDER BY 1", ["period", "amount"],
+    )
+    df["period"] = pd.to_datetime(df["period"])
+    return df
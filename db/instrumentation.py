@@ -0,0 +1,129 @@
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("exp_tracker.sql")
+
+ENABLED = os.getenv("SQL_INSTRUMENTATION", "1") != "0"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+SAMPLE_SIZE = 500
+
+_lock = threading.Lock()
+_queries: Dict[str, Dict[str, Any]] = {}
+_overhead = {"seconds": 0.0, "statements": 0}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|:\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    fp = _STRING.sub("?", statement)
+    fp = _PARAM.sub("?", fp)
+    fp = _NUMBER.sub("?", fp)
+    fp = _IN_LIST.sub("(?)", fp)
+    return _SPACE.sub(" ", fp).strip()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    now = time.perf_counter()
+    elapsed_ms = (now - conn.info["query_start"].pop()) * 1000
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    pool_wait_ms = conn.info.pop("pool_wait_ms", 0.0)
+    fp = fingerprint(statement)
+
+    with _lock:
+        q = _queries.get(fp)
+        if q is None:
+            q = _queries[fp] = {"calls": 0, "rows": 0, "total_ms": 0.0, "samples": deque(maxlen=SAMPLE_SIZE)}
+        q["calls"] += 1
+        q["rows"] += rows or 0
+        q["total_ms"] += elapsed_ms
+        q["samples"].append(elapsed_ms)
+
+    slow = elapsed_ms >= SLOW_QUERY_MS
+    if slow or logger.isEnabledFor(logging.DEBUG):
+        logger.log(
+            logging.WARNING if slow else logging.DEBUG,
+            json.dumps({
+                "event": "slow_query" if slow else "query",
+                "fingerprint": fp,
+                "ms": round(elapsed_ms, 2),
+                "rows": rows,
+                "pool_wait_ms": round(pool_wait_ms, 2),
+                "executemany": executemany,
+            }),
+        )
+
+    with _lock:
+        _overhead["seconds"] += time.perf_counter() - now
+        _overhead["statements"] += 1
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for a failed statement; drop its start
+    # time so it does not linger on the pooled connection.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def query_stats() -> List[Dict[str, Any]]:
+    with _lock:
+        snapshot = {fp: dict(q, samples=sorted(q["samples"])) for fp, q in _queries.items()}
+    rows = []
+    for fp, q in snapshot.items():
+        rows.append({
+            "fingerprint": fp,
+            "calls": q["calls"],
+            "rows": q["rows"],
+            "total_ms": round(q["total_ms"], 1),
+            "p50_ms": round(_percentile(q["samples"], 50), 2),
+            "p95_ms": round(_percentile(q["samples"], 95), 2),
+            "max_ms": round(q["samples"][-1], 2) if q["samples"] else 0.0,
+        })
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def overhead_stats() -> Dict[str, float]:
+    with _lock:
+        seconds, statements = _overhead["seconds"], _overhead["statements"]
+    return {
+        "statements": statements,
+        "total_ms": round(seconds * 1000, 2),
+        "per_statement_us": round(seconds * 1e6 / statements, 2) if statements else 0.0,
+    }
+
+
+def reset_stats() -> None:
+    with _lock:
+        _queries.clear()
+        _overhead.update(seconds=0.0, statements=0)
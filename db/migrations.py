@@ -0,0 +1,228 @@
+from typing import List, Optional
+import streamlit as st
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from db.conn import get_engine
+
+# Arbitrary application-wide key so concurrent replicas serialise on startup.
+MIGRATION_LOCK_KEY = 7_263_410_958
+
+MIGRATIONS = [
+    (1, "baseline schema", """
+        CREATE TABLE IF NOT EXISTS categories (
+            id   SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('expense','income')),
+            UNIQUE(name, kind)
+        );
+
+        CREATE TABLE IF NOT EXISTS transactions (
+            id          SERIAL PRIMARY KEY,
+            tx_date     DATE NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            amount      NUMERIC NOT NULL CHECK (amount >= 0),
+            category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL,
+            account     TEXT NOT NULL DEFAULT 'Cash',
+            created_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+
+        CREATE TABLE IF NOT EXISTS accounts (
+            id   SERIAL PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_tx_date     ON transactions(tx_date);
+        CREATE INDEX IF NOT EXISTS idx_category_id ON transactions(category_id);
+    """),
+    (2, "default categories and accounts", """
+        INSERT INTO categories (name, kind)
+        VALUES ('Salary', 'income'),
+               ('Freelance', 'income'),
+               ('Food', 'expense'),
+               ('Rent', 'expense'),
+               ('Utilities', 'expense'),
+               ('Entertainment', 'expense')
+        ON CONFLICT (name, kind) DO NOTHING;
+
+        INSERT INTO accounts (name)
+        VALUES ('Cash')
+        ON CONFLICT (name) DO NOTHING;
+    """),
+    (3, "keyset index on transactions (tx_date, id)", """
+        CREATE INDEX IF NOT EXISTS idx_tx_date_id ON transactions(tx_date, id);
+    """),
+    (4, "daily_totals rollup", """
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            tx_date     DATE NOT NULL,
+            category_id INTEGER,
+            account     TEXT NOT NULL,
+            kind        TEXT,
+            total       NUMERIC NOT NULL DEFAULT 0,
+            n           BIGINT NOT NULL DEFAULT 0,
+            CONSTRAINT daily_totals_key UNIQUE NULLS NOT DISTINCT (tx_date, category_id, account, kind)
+        );
+
+        INSERT INTO daily_totals (tx_date, category_id, account, kind, total, n)
+        SELECT t.tx_date, t.category_id, t.account, c.kind, SUM(t.amount), COUNT(*)
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        WHERE NOT EXISTS (SELECT 1 FROM daily_totals)
+        GROUP BY t.tx_date, t.category_id, t.account, c.kind;
+    """),
+    (5, "composite and covering indexes for date + category access paths", """
+        CREATE INDEX IF NOT EXISTS idx_tx_date_cat ON transactions (tx_date, category_id) INCLUDE (amount);
+        CREATE INDEX IF NOT EXISTS idx_tx_cat_date ON transactions (category_id, tx_date);
+        DROP INDEX IF EXISTS idx_tx_date;
+        DROP INDEX IF EXISTS idx_category_id;
+
+        CREATE INDEX IF NOT EXISTS idx_daily_totals_cover ON daily_totals (tx_date, category_id) INCLUDE (kind, total, n);
+    """),
+    (6, "content fingerprint for import deduplication", """
+        -- `occurrence` numbers identical rows within one import so that genuine
+        -- repeats (two equal purchases on the same day) survive deduplication.
+        CREATE OR REPLACE FUNCTION tx_fingerprint(
+            tx_date DATE, amount NUMERIC, description TEXT, account TEXT, category_id INTEGER, occurrence BIGINT
+        ) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT md5(concat_ws('|',
+                tx_date::text,
+                round(amount, 2)::text,
+                lower(btrim(coalesce(description, ''))),
+                lower(btrim(account)),
+                coalesce(category_id::text, ''),
+                occurrence::text
+            ))
+        $$;
+
+        ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fingerprint TEXT;
+
+        UPDATE transactions t
+        SET fingerprint = tx_fingerprint(t.tx_date, t.amount, t.description, t.account, t.category_id, o.occurrence)
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY tx_date, round(amount, 2), lower(btrim(coalesce(description, ''))),
+                             lower(btrim(account)), category_id
+                ORDER BY id
+            ) AS occurrence
+            FROM transactions
+        ) o
+        WHERE o.id = t.id AND t.fingerprint IS NULL;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tx_fingerprint ON transactions (fingerprint);
+    """),
+    (7, "per-account balance ledger", """
+        ALTER TABLE accounts ADD COLUMN IF NOT EXISTS balance NUMERIC NOT NULL DEFAULT 0;
+
+        CREATE TABLE IF NOT EXISTS account_monthly (
+            account TEXT NOT NULL,
+            month   DATE NOT NULL,
+            delta   NUMERIC NOT NULL DEFAULT 0,
+            n       BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (account, month)
+        );
+
+        INSERT INTO account_monthly (account, month, delta, n)
+        SELECT t.account, date_trunc('month', t.tx_date)::date,
+               SUM(CASE WHEN c.kind = 'income' THEN t.amount ELSE -t.amount END), COUNT(*)
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        WHERE NOT EXISTS (SELECT 1 FROM account_monthly)
+        GROUP BY 1, 2;
+
+        INSERT INTO accounts (name, balance)
+        SELECT account, SUM(delta) FROM account_monthly GROUP BY account
+        ON CONFLICT (name) DO UPDATE SET balance = EXCLUDED.balance;
+    """),
+    (8, "fingerprint index keyed with tx_date", """
+        -- tx_date is already part of the fingerprint, so uniqueness is unchanged;
+        -- including it keeps the index valid on a date-partitioned table.
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tx_fingerprint_date ON transactions (fingerprint, tx_date);
+        DROP INDEX IF EXISTS idx_tx_fingerprint;
+    """),
+    (9, "background import jobs", """
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id             BIGSERIAL PRIMARY KEY,
+            file_name      TEXT NOT NULL,
+            source_path    TEXT NOT NULL,
+            options        JSONB NOT NULL DEFAULT '{}',
+            status         TEXT NOT NULL DEFAULT 'queued'
+                           CHECK (status IN ('queued', 'running', 'done', 'failed')),
+            chunks_done    INTEGER NOT NULL DEFAULT 0,
+            rows_read      BIGINT NOT NULL DEFAULT 0,
+            rows_imported  BIGINT NOT NULL DEFAULT 0,
+            rows_duplicate BIGINT NOT NULL DEFAULT 0,
+            rows_rejected  BIGINT NOT NULL DEFAULT 0,
+            bytes_total    BIGINT NOT NULL DEFAULT 0,
+            bytes_done     BIGINT NOT NULL DEFAULT 0,
+            run_rows       BIGINT NOT NULL DEFAULT 0,
+            rejected_path  TEXT,
+            error          TEXT,
+            worker         TEXT,
+            created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at     TIMESTAMPTZ,
+            heartbeat_at   TIMESTAMPTZ,
+            finished_at    TIMESTAMPTZ
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_import_jobs_pending ON import_jobs (id) WHERE status IN ('queued', 'running');
+    """),
+    (10, "full-text and trigram search on descriptions", """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+        -- 'simple' keeps merchant names and short words unstemmed.
+        ALTER TABLE transactions ADD COLUMN IF NOT EXISTS description_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, ''))) STORED;
+
+        CREATE INDEX IF NOT EXISTS idx_tx_description_tsv ON transactions USING GIN (description_tsv);
+        CREATE INDEX IF NOT EXISTS idx_tx_description_trgm ON transactions USING GIN (description gin_trgm_ops);
+    """),
+    (11, "host that spooled each import job", """
+        ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS spool_host TEXT;
+    """),
+]
+
+
+def migrate(engine: Optional[Engine] = None) -> List[int]:
+    engine = engine or get_engine()
+    applied_now = []
+
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_KEY})
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version    INTEGER PRIMARY KEY,
+                name       TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """))
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+        for version, name, sql in MIGRATIONS:
+            if version in applied:
+                continue
+            conn.execute(text(sql))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                {"v": version, "n": name},
+            )
+            applied_now.append(version)
+
+    return applied_now
+
+
+def pending_migrations(engine: Optional[Engine] = None) -> List[int]:
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar()
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars()) if exists else set()
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+
+@st.cache_resource
+def ensure_schema() -> List[int]:
+    from db.partitions import ensure_upcoming_partitions
+
+    applied = migrate()
+    ensure_upcoming_partitions()
+    return applied
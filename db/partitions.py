@@ -0,0 +1,187 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from db.conn import get_engine
+
+# Optional layout: `transactions` RANGE-partitioned by month on tx_date, with a
+# DEFAULT partition catching anything outside the ranges created so far.
+PARTITION_LOCK_KEY = 7_263_410_959
+MONTHS_AHEAD = 3
+DEFAULT_PARTITION = "transactions_pdefault"
+DDL_LOCK_TIMEOUT = "10s"
+
+# Unique constraints on a partitioned table must contain the partition key.
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_tx_date_id ON transactions (tx_date, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tx_date_cat ON transactions (tx_date, category_id) INCLUDE (amount)",
+    "CREATE INDEX IF NOT EXISTS idx_tx_cat_date ON transactions (category_id, tx_date)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_tx_fingerprint_date ON transactions (fingerprint, tx_date)",
+    "CREATE INDEX IF NOT EXISTS idx_tx_description_tsv ON transactions USING GIN (description_tsv)",
+    "CREATE INDEX IF NOT EXISTS idx_tx_description_trgm ON transactions USING GIN (description gin_trgm_ops)",
+]
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_p{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.oid = to_regclass('transactions')
+        )
+    """)).scalar())
+
+
+def _existing_partitions(conn: Connection) -> set:
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('transactions')
+    """)).scalars().all()
+    return set(rows)
+
+
+def _insert_columns(conn: Connection) -> str:
+    return conn.execute(text("""
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        FROM pg_attribute
+        WHERE attrelid = to_regclass('transactions') AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+    """)).scalar()
+
+
+def _create_month(conn: Connection, month: date) -> None:
+    name, upper = partition_name(month), month + relativedelta(months=1)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    has_default = conn.execute(text("SELECT to_regclass(:n) IS NOT NULL"), {"n": DEFAULT_PARTITION}).scalar()
+    stray = has_default and conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE tx_date >= :lo AND tx_date < :hi)"),
+        {"lo": month, "hi": upper},
+    ).scalar()
+
+    if not stray:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF transactions FOR VALUES {bounds}"))
+        return
+
+    # Rows for this month already landed in the default partition: move them
+    # into a standalone table first, then attach it (attach re-checks default).
+    conn.execute(text(f"""
+        CREATE TABLE {name}
+        (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)
+    """))
+    columns = _insert_columns(conn)
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE tx_date >= :lo AND tx_date < :hi RETURNING {columns}
+        )
+        INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+    """), {"lo": month, "hi": upper})
+    conn.execute(text(f"ALTER TABLE transactions ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+
+# Creates any missing monthly partitions covering [start, end]; a no-op while
+# `transactions` is still a plain table.
+def ensure_partitions(conn: Connection, start: date, end: date) -> List[str]:
+    if not is_partitioned(conn):
+        return []
+    months, month = [], _month_start(min(start, end))
+    while month <= max(start, end):
+        months.append(month)
+        month += relativedelta(months=1)
+
+    # Only take the lock (and DDL's ACCESS EXCLUSIVE on transactions) when
+    # something is actually missing; re-check once the lock is held.
+    existing = _existing_partitions(conn)
+    if all(partition_name(m) in existing for m in months):
+        return []
+    conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": PARTITION_LOCK_KEY})
+    existing = _existing_partitions(conn)
+    created = []
+    for month in months:
+        if partition_name(month) not in existing:
+            _create_month(conn, month)
+            created.append(partition_name(month))
+    return created
+
+
+# Same, in a short transaction of its own. Partition DDL takes ACCESS EXCLUSIVE
+# on transactions and every later reader queues behind the request, so it gives
+# up after DDL_LOCK_TIMEOUT rather than waiting out a long-running load.
+def ensure_partitions_now(start: date, end: date, engine: Optional[Engine] = None) -> List[str]:
+    with (engine or get_engine()).begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+        return ensure_partitions(conn, start, end)
+
+
+def ensure_upcoming_partitions(engine: Optional[Engine] = None, months_ahead: int = MONTHS_AHEAD) -> List[str]:
+    today = date.today()
+    return ensure_partitions_now(_month_start(today), today + relativedelta(months=months_ahead), engine)
+
+
+def convert_to_partitioned(engine: Optional[Engine] = None, months_ahead: int = MONTHS_AHEAD) -> int:
+    with (engine or get_engine()).begin() as conn:
+        if is_partitioned(conn):
+            return 0
+        conn.execute(text("LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE"))
+        columns = _insert_columns(conn)
+        lo, hi = conn.execute(text("SELECT min(tx_date), max(tx_date) FROM transactions")).one()
+
+        conn.execute(text("""
+            CREATE TABLE transactions_partitioned
+            (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)
+            PARTITION BY RANGE (tx_date)
+        """))
+        conn.execute(text("ALTER TABLE transactions_partitioned ADD PRIMARY KEY (id, tx_date)"))
+        conn.execute(text(
+            "ALTER TABLE transactions_partitioned ADD FOREIGN KEY (category_id) "
+            "REFERENCES categories(id) ON DELETE SET NULL"
+        ))
+        # The id sequence is owned by the old table's column and would be
+        # dropped with it.
+        conn.execute(text("ALTER SEQUENCE transactions_id_seq OWNED BY NONE"))
+
+        today = date.today()
+        month, last = _month_start(min(lo or today, today)), max(hi or today, today) + relativedelta(months=months_ahead)
+        while month <= last:
+            upper = month + relativedelta(months=1)
+            conn.execute(text(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF transactions_partitioned "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            month = upper
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF transactions_partitioned DEFAULT"))
+
+        result = conn.execute(text(
+            f"INSERT INTO transactions_partitioned ({columns}) SELECT {columns} FROM transactions"
+        ))
+        conn.execute(text("DROP TABLE transactions"))
+        conn.execute(text("ALTER TABLE transactions_partitioned RENAME TO transactions"))
+        conn.execute(text("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id"))
+        for ddl in _INDEXES:
+            conn.execute(text(ddl))
+        conn.execute(text("ANALYZE transactions"))
+    return int(result.rowcount)
+
+
+def partition_stats(engine: Optional[Engine] = None) -> List[Dict[str, Any]]:
+    with (engine or get_engine()).connect() as conn:
+        rows = conn.execute(text("""
+            SELECT c.relname AS partition,
+                   pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                   c.reltuples::bigint AS est_rows,
+                   pg_total_relation_size(c.oid) AS bytes
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('transactions')
+            ORDER BY c.relname
+        """)).mappings().all()
+    return [dict(r) for r in rows]
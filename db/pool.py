@@ -0,0 +1,115 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool, QueuePool
+from db.instrumentation import SAMPLE_SIZE, _percentile
+
+# "queue" keeps connections open in-process; "null" opens one per checkout and
+# is meant for running behind a transaction-pooling proxy such as PgBouncer,
+# which then owns the pooling.
+POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(POOL_SIZE)))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") != "0"
+
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_lock = threading.Lock()
+_waits: deque = deque(maxlen=SAMPLE_SIZE)
+_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+_counters = {"checked_out": 0, "connects": 0, "closes": 0, "invalidations": 0}
+
+
+class _TimedCheckout:
+    def _do_get(self):
+        t0 = time.perf_counter()
+        record = super()._do_get()
+        wait_ms = (time.perf_counter() - t0) * 1000
+        record.info["pool_wait_ms"] = wait_ms
+        with _lock:
+            _waits.append(wait_ms)
+            _histogram[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+        return record
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def pool_options() -> Dict[str, Any]:
+    if POOL_MODE == "null":
+        return {"poolclass": TimedNullPool, "pool_pre_ping": POOL_PRE_PING}
+    if POOL_MODE != "queue":
+        raise ValueError(f"Unsupported DB_POOL_MODE: {POOL_MODE!r}")
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+        # LIFO keeps reusing the most recently returned connections; surplus
+        # ones sit idle and are only recycled or pinged on their next checkout.
+        "pool_use_lifo": True,
+    }
+
+
+def _count(name: str, delta: int = 1):
+    def listener(*args):
+        with _lock:
+            _counters[name] += delta
+    return listener
+
+
+def watch_pool(engine: Engine) -> None:
+    event.listen(engine, "connect", _count("connects"))
+    event.listen(engine, "close", _count("closes"))
+    event.listen(engine, "close_detached", _count("closes"))
+    event.listen(engine, "invalidate", _count("invalidations"))
+    event.listen(engine, "checkout", _count("checked_out"))
+    event.listen(engine, "checkin", _count("checked_out", -1))
+
+
+def pool_metrics(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    with _lock:
+        counters = dict(_counters)
+        histogram = list(_histogram)
+    labels = [f"≤{b} ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]} ms"]
+    return {
+        "mode": POOL_MODE,
+        "size": pool.size() if isinstance(pool, QueuePool) else 0,
+        "idle": pool.checkedin() if isinstance(pool, QueuePool) else 0,
+        "overflow": max(0, pool.overflow()) if isinstance(pool, QueuePool) else 0,
+        **counters,
+        "wait_histogram": dict(zip(labels, histogram)),
+    }
+
+
+def pool_wait_stats() -> Dict[str, float]:
+    with _lock:
+        waits = sorted(_waits)
+    return {
+        "checkouts": len(waits),
+        "p50_ms": round(_percentile(waits, 50), 3),
+        "p95_ms": round(_percentile(waits, 95), 3),
+        "max_ms": round(waits[-1], 3) if waits else 0.0,
+    }
+
+
+def reset_pool_stats() -> None:
+    with _lock:
+        _waits.clear()
+        _histogram[:] = [0] * len(_histogram)
+        _counters.update(connects=0, closes=0, invalidations=0)
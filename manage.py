@@ -0,0 +1,107 @@
+import argparse
+import sys
+
+
+def _migrate(args) -> int:
+    from db.migrations import migrate, pending_migrations
+
+    if args.check:
+        pending = pending_migrations()
+        print(f"pending migrations: {pending or 'none'}")
+        return 1 if pending else 0
+
+    applied = migrate()
+    print(f"applied migrations: {applied or 'none'}")
+    return 0
+
+
+def _rollups(args) -> int:
+    from repos.rollups_repo import rebuild_daily_totals, verify_daily_totals
+
+    if args.action == "rebuild":
+        print(f"daily_totals rebuilt: {rebuild_daily_totals()} row(s)")
+        return 0
+
+    mismatches = verify_daily_totals()
+    for m in mismatches[:50]:
+        print(m)
+    print(f"daily_totals: {len(mismatches)} mismatching bucket(s)")
+    return 1 if mismatches else 0
+
+
+def _ledger(args) -> int:
+    from repos.rollups_repo import rebuild_account_ledger, verify_account_ledger
+
+    if args.action == "rebuild":
+        print(f"account ledger rebuilt: {rebuild_account_ledger()} account-month(s)")
+        return 0
+
+    mismatches = verify_account_ledger()
+    for m in mismatches[:50]:
+        print(m)
+    print(f"account ledger: {len(mismatches)} mismatching row(s)")
+    return 1 if mismatches else 0
+
+
+def _partitions(args) -> int:
+    from db.migrations import migrate
+    from db.partitions import convert_to_partitioned, ensure_upcoming_partitions, partition_stats
+
+    if args.action == "convert":
+        migrate()
+        print(f"transactions partitioned: {convert_to_partitioned(months_ahead=args.months_ahead)} row(s) moved")
+    elif args.action == "ensure":
+        created = ensure_upcoming_partitions(months_ahead=args.months_ahead)
+        print(f"created partitions: {created or 'none'}")
+
+    stats = partition_stats()
+    for p in stats:
+        print(f"{p['partition']:<24} {p['bounds']:<60} ~{p['est_rows']:>10,} rows {p['bytes'] / 2**20:>9.1f} MB")
+    if not stats:
+        print("transactions is not partitioned")
+    return 0
+
+
+def _snapshot(args) -> int:
+    from data.snapshot import refresh_snapshot, snapshot_status
+
+    if args.action == "status":
+        print(snapshot_status())
+        return 0
+
+    meta = refresh_snapshot(rebuild=args.action == "rebuild")
+    print(f"snapshot: {meta['rows']} row(s) up to id {meta['watermark']} in {len(meta['parts'])} file(s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="manage.py", description="Expense Tracker maintenance commands.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="Apply pending schema migrations.")
+    migrate.add_argument("--check", action="store_true", help="Only list pending migrations.")
+    migrate.set_defaults(func=_migrate)
+
+    rollups = sub.add_parser("rollups", help="Rebuild or verify the daily_totals rollup table.")
+    rollups.add_argument("action", choices=["rebuild", "verify"])
+    rollups.set_defaults(func=_rollups)
+
+    ledger = sub.add_parser("ledger", help="Rebuild or verify account balances against transactions.")
+    ledger.add_argument("action", choices=["rebuild", "verify"])
+    ledger.set_defaults(func=_ledger)
+
+    partitions = sub.add_parser("partitions", help="Convert transactions to monthly partitions or manage them.")
+    partitions.add_argument("action", choices=["convert", "ensure", "status"])
+    partitions.add_argument("--months-ahead", type=int, default=3, help="Months of empty partitions to keep ready.")
+    partitions.set_defaults(func=_partitions)
+
+    snapshot = sub.add_parser("snapshot", help="Refresh or inspect the Parquet analytics snapshot.")
+    snapshot.add_argument("action", choices=["refresh", "rebuild", "status"])
+    snapshot.set_defaults(func=_snapshot)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from typing import Optional, Sequence
+import pandas as pd
+from sqlalchemy import text, bindparam
+from db.conn import get_engine
+
+
+def account_balances() -> pd.DataFrame:
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("SELECT name AS account, balance FROM accounts ORDER BY name")).mappings().all()
+
+    df = pd.DataFrame(rows, columns=["account", "balance"])
+    df["balance"] = df["balance"].astype(float)
+    return df
+
+
+def balance_history(
+    accounts: Optional[Sequence[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> pd.DataFrame:
+    # The running sum has to start at the account's first month, so `since`
+    # only trims the output after the window is computed.
+    clauses, params, bindparams = [], {}, []
+    if accounts:
+        clauses.append("account IN :accounts")
+        params["accounts"] = list(accounts)
+        bindparams.append(bindparam("accounts", expanding=True))
+    if until is not None:
+        clauses.append("month <= date_trunc('month', CAST(:until AS date))")
+        params["until"] = str(until)
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sql = f"""
+        SELECT account, month, balance
+        FROM (
+            SELECT account, month,
+                   SUM(delta) OVER (PARTITION BY account ORDER BY month) AS balance
+            FROM account_monthly
+            {where_sql}
+        ) h
+        WHERE CAST(:since AS date) IS NULL OR month >= date_trunc('month', CAST(:since AS date))
+        ORDER BY account, month
+    """
+    params["since"] = None if since is None else str(since)
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(stmt, params).mappings().all()
+
+    df = pd.DataFrame(rows, columns=["account", "month", "balance"])
+    df["month"] = pd.to_datetime(df["month"], errors="coerce")
+    df["balance"] = df["balance"].astype(float)
+    return df
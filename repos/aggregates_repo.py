@@ -0,0 +1,70 @@
+from typing import Optional, Sequence
+import pandas as pd
+from sqlalchemy import text
+from db.conn import get_engine
+from repos.transactions_repo import _build_filters
+
+PERIOD_GRAINS = ("day", "week", "month")
+
+
+def _expense_filters(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category_ids: Optional[Sequence[int]] = None,
+):
+    where_sql, params, bindparams = _build_filters(start, end, category_ids)
+    where_sql = f"{where_sql} AND t.kind = 'expense'" if where_sql else "WHERE t.kind = 'expense'"
+    return where_sql, params, bindparams
+
+
+def expenses_by_category(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category_ids: Optional[Sequence[int]] = None,
+) -> pd.DataFrame:
+    where_sql, params, bindparams = _expense_filters(start, end, category_ids)
+
+    sql = f"""
+        SELECT c.name AS category, SUM(t.total) AS amount
+        FROM daily_totals t
+        JOIN categories c ON c.id = t.category_id
+        {where_sql}
+        GROUP BY c.id, c.name
+        ORDER BY amount DESC
+    """
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(stmt, params).mappings().all()
+
+    df = pd.DataFrame(rows, columns=["category", "amount"])
+    df["amount"] = df["amount"].astype(float)
+    return df
+
+
+def expenses_by_period(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    category_ids: Optional[Sequence[int]] = None,
+    grain: str = "week",
+) -> pd.DataFrame:
+    if grain not in PERIOD_GRAINS:
+        raise ValueError(f"Unsupported grain: {grain!r}")
+    where_sql, params, bindparams = _expense_filters(start, end, category_ids)
+
+    sql = f"""
+        SELECT date_trunc('{grain}', t.tx_date)::date AS period, SUM(t.total) AS amount
+        FROM daily_totals t
+        {where_sql}
+        GROUP BY 1
+        ORDER BY 1
+    """
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(stmt, params).mappings().all()
+
+    df = pd.DataFrame(rows, columns=["period", "amount"])
+    df["period"] = pd.to_datetime(df["period"], errors="coerce")
+    df["amount"] = df["amount"].astype(float)
+    return df
@@ -1,6 +1,54 @@
-from typing import Optional, List, Dict
+import threading
+import time
+from typing import Optional, List, Dict, Iterable, Tuple
 from sqlalchemy import text
 from db.conn import get_engine
+from utils.cache import bump_generation, current_generation
+
+class CategoryRegistry:
+    def __init__(self, rows: List[Dict]):
+        self._rows = rows
+        self._by_key = {(r["name"], r["kind"]): r["id"] for r in rows}
+        self._by_id = {r["id"]: r for r in rows}
+        self._names_by_kind: Dict[str, List[str]] = {}
+        for r in rows:
+            self._names_by_kind.setdefault(r["kind"], []).append(r["name"])
+
+    def id_for(self, name: str, kind: str) -> Optional[int]:
+        return self._by_key.get((name, kind))
+
+    def get(self, category_id: int) -> Optional[Dict]:
+        return self._by_id.get(category_id)
+
+    def names(self, kind: str) -> List[str]:
+        return list(self._names_by_kind.get(kind, []))
+
+    def all(self) -> List[Dict]:
+        return list(self._rows)
+
+_REGISTRY_GENERATION = "categories"
+# The generation is per process under the default memory cache backend, so a
+# category added by another replica only shows up once this TTL runs out.
+REGISTRY_TTL_S = 30
+_registry_lock = threading.Lock()
+_registry: Optional[Tuple[int, float, CategoryRegistry]] = None
+
+def bump_registry_version() -> None:
+    bump_generation(_REGISTRY_GENERATION)
+
+def get_category_registry() -> CategoryRegistry:
+    global _registry
+    version = current_generation(_REGISTRY_GENERATION)
+    with _registry_lock:
+        cached = _registry
+    if cached is not None and cached[0] == version and time.monotonic() - cached[1] < REGISTRY_TTL_S:
+        return cached[2]
+
+    loaded_at = time.monotonic()
+    registry = CategoryRegistry(list_all_categories())
+    with _registry_lock:
+        _registry = (version, loaded_at, registry)
+    return registry
 
 def list_categories_by_kind(kind: str) -> List[str]:
     sql = text("SELECT name FROM categories WHERE kind = :k ORDER BY name;")
@@ -15,6 +63,7 @@ def insert_category(name: str, kind: str) -> None:
     """)
     with get_engine().begin() as conn:   
         conn.execute(sql, {"n": name, "k": kind})
+    bump_registry_version()
 
 def list_all_categories() -> List[Dict]:
     sql = text("SELECT id, name, kind FROM categories ORDER BY kind, name;")
@@ -23,12 +72,23 @@ def list_all_categories() -> List[Dict]:
     return [{"id": int(r["id"]), "name": r["name"], "kind": r["kind"]} for r in rows]
 
 def get_category_id_by_name(name: str, kind: str) -> Optional[int]:
+    cat_id = get_category_registry().id_for(name, kind)
+    if cat_id is not None:
+        return cat_id
+
     sql = text("SELECT id FROM categories WHERE name = :n AND kind = :k;")
     with get_engine().connect() as conn:
         val = conn.execute(sql, {"n": name, "k": kind}).scalar()
-    return int(val) if val is not None else None
+    if val is None:
+        return None
+    bump_registry_version()
+    return int(val)
 
 def get_or_create_category(name: str, kind: str) -> int:
+    cat_id = get_category_registry().id_for(name, kind)
+    if cat_id is not None:
+        return cat_id
+
     sql = text("""
         INSERT INTO categories (name, kind)
         VALUES (:n, :k)
@@ -38,4 +98,47 @@ def get_or_create_category(name: str, kind: str) -> int:
     """)
     with get_engine().begin() as conn:
         cat_id = conn.execute(sql, {"n": name, "k": kind}).scalar_one()
+    bump_registry_version()
     return int(cat_id)
+
+def get_category_ids(pairs: Iterable[Tuple[str, str]], create_missing: bool) -> Dict[Tuple[str, str], int]:
+    registry = get_category_registry()
+    resolved: Dict[Tuple[str, str], int] = {}
+    missing = []
+    for pair in sorted(set(pairs)):
+        cat_id = registry.id_for(*pair)
+        if cat_id is None:
+            missing.append(pair)
+        else:
+            resolved[pair] = cat_id
+    if not missing:
+        return resolved
+
+    lookup = """
+        SELECT c.id, c.name, c.kind
+        FROM categories c
+        JOIN unnest(CAST(:names AS text[]), CAST(:kinds AS text[])) AS p(name, kind)
+          ON c.name = p.name AND c.kind = p.kind
+    """
+    if create_missing:
+        sql = text(f"""
+            WITH ins AS (
+                INSERT INTO categories (name, kind)
+                SELECT * FROM unnest(CAST(:names AS text[]), CAST(:kinds AS text[]))
+                ON CONFLICT (name, kind) DO NOTHING
+                RETURNING id, name, kind
+            )
+            SELECT id, name, kind FROM ins
+            UNION ALL
+            {lookup};
+        """)
+    else:
+        sql = text(lookup)
+
+    params = {"names": [p[0] for p in missing], "kinds": [p[1] for p in missing]}
+    with get_engine().begin() as conn:
+        rows = conn.execute(sql, params).mappings().all()
+    if rows:
+        bump_registry_version()
+    resolved.update({(r["name"], r["kind"]): int(r["id"]) for r in rows})
+    return resolved
@@ -0,0 +1,136 @@
+import json
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from db.conn import get_engine
+
+_JOB_COLUMNS = """
+    id, file_name, source_path, options, status, chunks_done, rows_read, rows_imported,
+    rows_duplicate, rows_rejected, bytes_total, bytes_done, run_rows, rejected_path, error,
+    worker, spool_host, created_at, started_at, heartbeat_at, finished_at
+"""
+
+
+def insert_job(
+    file_name: str,
+    source_path: str,
+    options: Dict[str, Any],
+    bytes_total: int,
+    rejected_path: str,
+    spool_host: str,
+) -> int:
+    with get_engine().begin() as conn:
+        return conn.execute(text("""
+            INSERT INTO import_jobs (file_name, source_path, options, bytes_total, rejected_path, spool_host)
+            VALUES (:file_name, :source_path, CAST(:options AS jsonb), :bytes_total, :rejected_path, :spool_host)
+            RETURNING id
+        """), {
+            "file_name": file_name,
+            "source_path": source_path,
+            "options": json.dumps(options),
+            "bytes_total": int(bytes_total),
+            "rejected_path": rejected_path,
+            "spool_host": spool_host,
+        }).scalar_one()
+
+
+def claim_job(worker: str, stale_after_s: float, host: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # Running jobs whose heartbeat stopped belong to a worker that died; they
+    # are picked up again and resume from their last committed chunk. With a
+    # `host`, only jobs spooled on that host are eligible: the file lives there.
+    with get_engine().begin() as conn:
+        row = conn.execute(text(f"""
+            UPDATE import_jobs
+            SET status = 'running', worker = :worker, error = NULL,
+                started_at = now(), heartbeat_at = now(), run_rows = 0
+            WHERE id = (
+                SELECT id FROM import_jobs
+                WHERE (status = 'queued'
+                       OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale)))
+                  AND (CAST(:host AS text) IS NULL OR spool_host IS NULL OR spool_host = :host)
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {_JOB_COLUMNS}
+        """), {"worker": worker, "stale": float(stale_after_s), "host": host}).mappings().first()
+    return dict(row) if row else None
+
+
+def lock_job(conn: Connection, job_id: int, worker: str) -> bool:
+    # Held until the chunk commits, so a slow chunk is never mistaken for a
+    # dead worker and claimed twice.
+    return conn.execute(text("""
+        SELECT 1 FROM import_jobs WHERE id = :id AND worker = :worker FOR UPDATE
+    """), {"id": job_id, "worker": worker}).first() is not None
+
+
+def touch_job(job_id: int, worker: str) -> bool:
+    # A chunk transaction may hold the row; that already keeps the job from
+    # being claimed, so give up quickly instead of queueing behind it.
+    with get_engine().begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '1s'"))
+        result = conn.execute(text("""
+            UPDATE import_jobs SET heartbeat_at = now()
+            WHERE id = :id AND worker = :worker AND status = 'running'
+        """), {"id": job_id, "worker": worker})
+    return result.rowcount > 0
+
+
+def checkpoint_job(
+    conn: Connection,
+    job_id: int,
+    chunks_done: int,
+    rows_read: int,
+    imported: int,
+    duplicates: int,
+    rejected: int,
+    bytes_done: int,
+) -> None:
+    conn.execute(text("""
+        UPDATE import_jobs
+        SET chunks_done = :chunks_done,
+            rows_read = rows_read + :rows_read,
+            rows_imported = rows_imported + :imported,
+            rows_duplicate = rows_duplicate + :duplicates,
+            rows_rejected = rows_rejected + :rejected,
+            run_rows = run_rows + :rows_read,
+            bytes_done = :bytes_done,
+            heartbeat_at = now()
+        WHERE id = :id
+    """), {
+        "id": job_id, "chunks_done": chunks_done, "rows_read": rows_read, "imported": imported,
+        "duplicates": duplicates, "rejected": rejected, "bytes_done": bytes_done,
+    })
+
+
+def finish_job(job_id: int, worker: str, error: Optional[str] = None) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(text("""
+            UPDATE import_jobs
+            SET status = CASE WHEN CAST(:error AS text) IS NULL THEN 'done' ELSE 'failed' END,
+                error = :error,
+                bytes_done = CASE WHEN CAST(:error AS text) IS NULL THEN bytes_total ELSE bytes_done END,
+                finished_at = now(), heartbeat_at = now()
+            WHERE id = :id AND worker = :worker
+        """), {"id": job_id, "worker": worker, "error": error})
+
+
+def requeue_job(job_id: int) -> bool:
+    with get_engine().begin() as conn:
+        result = conn.execute(text("""
+            UPDATE import_jobs SET status = 'queued', error = NULL, finished_at = NULL
+            WHERE id = :id AND status = 'failed'
+        """), {"id": job_id})
+    return result.rowcount > 0
+
+
+def list_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+    with get_engine().connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT {_JOB_COLUMNS}
+            FROM import_jobs
+            ORDER BY id DESC
+            LIMIT :lim
+        """), {"lim": int(limit)}).mappings().all()
+    return [dict(r) for r in rows]
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from db.conn import get_engine
+
+# `source` is any relation exposing (tx_date, category_id, account, amount)
+# for rows that were just written in the caller's transaction. Buckets are
+# upserted in key order so concurrent writers lock them in the same order.
+_DAILY_TOTALS_SQL = """
+    INSERT INTO daily_totals AS d (tx_date, category_id, account, kind, total, n)
+    SELECT s.tx_date, s.category_id, s.account, c.kind, SUM(s.amount), COUNT(*)
+    FROM {source} s
+    LEFT JOIN categories c ON c.id = s.category_id
+    GROUP BY s.tx_date, s.category_id, s.account, c.kind
+    ORDER BY s.tx_date, s.category_id, s.account, c.kind
+    ON CONFLICT ON CONSTRAINT daily_totals_key
+    DO UPDATE SET total = d.total + EXCLUDED.total, n = d.n + EXCLUDED.n
+"""
+
+_FRESH_DAILY_TOTALS_SQL = """
+    SELECT t.tx_date, t.category_id, t.account, c.kind, SUM(t.amount) AS total, COUNT(*) AS n
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    GROUP BY t.tx_date, t.category_id, t.account, c.kind
+"""
+
+
+# Income adds to an account, everything else (including rows whose category
+# was deleted) is spent from it. Like daily_totals above, rows are locked in
+# key order, so concurrent writers cannot deadlock on the ledger either.
+_LEDGER_SQL = """
+    WITH src AS (
+        SELECT s.account, date_trunc('month', s.tx_date)::date AS month,
+               CASE WHEN c.kind = 'income' THEN s.amount ELSE -s.amount END AS signed
+        FROM {source} s
+        LEFT JOIN categories c ON c.id = s.category_id
+    ),
+    monthly AS (
+        INSERT INTO account_monthly AS m (account, month, delta, n)
+        SELECT account, month, SUM(signed), COUNT(*)
+        FROM src
+        GROUP BY account, month
+        ORDER BY account, month
+        ON CONFLICT (account, month)
+        DO UPDATE SET delta = m.delta + EXCLUDED.delta, n = m.n + EXCLUDED.n
+    )
+    INSERT INTO accounts AS a (name, balance)
+    SELECT account, SUM(signed)
+    FROM src
+    GROUP BY account
+    ORDER BY account
+    ON CONFLICT (name) DO UPDATE SET balance = a.balance + EXCLUDED.balance
+"""
+
+_FRESH_ACCOUNT_MONTHLY_SQL = """
+    SELECT t.account, date_trunc('month', t.tx_date)::date AS month,
+           SUM(CASE WHEN c.kind = 'income' THEN t.amount ELSE -t.amount END) AS delta,
+           COUNT(*) AS n
+    FROM transactions t
+    LEFT JOIN categories c ON c.id = t.category_id
+    GROUP BY 1, 2
+"""
+
+
+def apply_rollups(conn: Connection, source: str, params: Optional[Dict[str, Any]] = None) -> None:
+    conn.execute(text(_DAILY_TOTALS_SQL.format(source=source)), params or {})
+    conn.execute(text(_LEDGER_SQL.format(source=source)), params or {})
+
+
+def rebuild_daily_totals(engine: Optional[Engine] = None) -> int:
+    with (engine or get_engine()).begin() as conn:
+        conn.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+        conn.execute(text("TRUNCATE daily_totals"))
+        result = conn.execute(text(f"""
+            INSERT INTO daily_totals (tx_date, category_id, account, kind, total, n)
+            {_FRESH_DAILY_TOTALS_SQL}
+        """))
+    return int(result.rowcount)
+
+
+def verify_daily_totals() -> List[Dict[str, Any]]:
+    sql = text(f"""
+        WITH fresh AS ({_FRESH_DAILY_TOTALS_SQL})
+        SELECT
+            COALESCE(f.tx_date, d.tx_date)         AS tx_date,
+            COALESCE(f.category_id, d.category_id) AS category_id,
+            COALESCE(f.account, d.account)         AS account,
+            COALESCE(f.kind, d.kind)               AS kind,
+            f.total AS expected_total, d.total AS stored_total,
+            f.n     AS expected_n,     d.n     AS stored_n
+        FROM fresh f
+        FULL JOIN daily_totals d
+          ON  f.tx_date = d.tx_date
+          AND COALESCE(f.category_id, 0) = COALESCE(d.category_id, 0)
+          AND f.account = d.account
+          AND COALESCE(f.kind, '') = COALESCE(d.kind, '')
+        WHERE f.total IS DISTINCT FROM d.total OR f.n IS DISTINCT FROM d.n
+        ORDER BY 1, 2, 3, 4
+    """)
+    with get_engine().connect() as conn:
+        rows = conn.execute(sql).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def rebuild_account_ledger(engine: Optional[Engine] = None) -> int:
+    with (engine or get_engine()).begin() as conn:
+        conn.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+        conn.execute(text("TRUNCATE account_monthly"))
+        result = conn.execute(text(f"""
+            INSERT INTO account_monthly (account, month, delta, n)
+            {_FRESH_ACCOUNT_MONTHLY_SQL}
+        """))
+        conn.execute(text("""
+            UPDATE accounts a
+            SET balance = COALESCE((SELECT SUM(m.delta) FROM account_monthly m WHERE m.account = a.name), 0)
+        """))
+        conn.execute(text("""
+            INSERT INTO accounts (name, balance)
+            SELECT account, SUM(delta) FROM account_monthly GROUP BY account
+            ON CONFLICT (name) DO NOTHING
+        """))
+    return int(result.rowcount)
+
+
+def verify_account_ledger() -> List[Dict[str, Any]]:
+    sql = text(f"""
+        WITH fresh AS ({_FRESH_ACCOUNT_MONTHLY_SQL}),
+        monthly AS (
+            SELECT COALESCE(f.account, m.account) AS account,
+                   COALESCE(f.month, m.month)     AS month,
+                   f.delta AS expected, m.delta AS stored
+            FROM fresh f
+            FULL JOIN account_monthly m ON m.account = f.account AND m.month = f.month
+            WHERE f.delta IS DISTINCT FROM m.delta OR f.n IS DISTINCT FROM m.n
+        ),
+        balances AS (
+            SELECT a.name AS account, NULL::date AS month,
+                   COALESCE(SUM(f.delta), 0) AS expected, a.balance AS stored
+            FROM accounts a
+            LEFT JOIN fresh f ON f.account = a.name
+            GROUP BY a.name, a.balance
+            HAVING COALESCE(SUM(f.delta), 0) <> a.balance
+        )
+        SELECT * FROM monthly
+        UNION ALL
+        SELECT * FROM balances
+        ORDER BY 1, 2 NULLS LAST
+    """)
+    with get_engine().connect() as conn:
+        rows = conn.execute(sql).mappings().all()
+    return [dict(r) for r in rows]
@@ -1,6 +1,19 @@
-from typing import Optional, Sequence, Tuple, Dict, Any
+import io
+from typing import Optional, Sequence, Tuple, Dict, Any, Iterator
+import pandas as pd
 from sqlalchemy import text, bindparam
+from sqlalchemy.engine import Connection
 from db.conn import get_engine
+from db.partitions import ensure_partitions, ensure_partitions_now
+from repos.categories_repo import get_category_id_by_name
+from repos.rollups_repo import apply_rollups
+
+BULK_COLUMNS = ["tx_date", "description", "amount", "category_id", "account"]
+_STAGING_COLUMNS = BULK_COLUMNS + ["occurrence"]
+
+_SINGLE_ROW_SOURCE = (
+    "(SELECT tx_date, category_id, account, amount FROM transactions WHERE id = :id AND tx_date = :tx_date)"
+)
 
 def _build_filters(
     start: Optional[str] = None,
@@ -32,12 +45,11 @@ def sum_expenses_between(
     category_ids: Optional[Sequence[int]] = None,
 ) -> float:
     where_sql, params, bindparams = _build_filters(start, end, category_ids)
-    where_sql = f"{where_sql} AND c.kind = 'expense'" if where_sql else "WHERE c.kind = 'expense'"
+    where_sql = f"{where_sql} AND t.kind = 'expense'" if where_sql else "WHERE t.kind = 'expense'"
 
     sql = f"""
-        SELECT COALESCE(SUM(t.amount), 0) AS total
-        FROM transactions t
-        LEFT JOIN categories c ON t.category_id = c.id
+        SELECT COALESCE(SUM(t.total), 0) AS total
+        FROM daily_totals t
         {where_sql}
     """
     stmt = text(sql).bindparams(*bindparams)
@@ -53,7 +65,7 @@ def count_transactions_between(
     category_ids: Optional[Sequence[int]] = None,
 ) -> int:
     where_sql, params, bindparams = _build_filters(start, end, category_ids)
-    sql = f"SELECT COUNT(*) AS n FROM transactions t {where_sql}"
+    sql = f"SELECT COALESCE(SUM(t.n), 0) AS n FROM daily_totals t {where_sql}"
     stmt = text(sql).bindparams(*bindparams)
 
     with get_engine().connect() as conn:
@@ -61,32 +73,18 @@ def count_transactions_between(
     return int(n)
 
 
-def insert_transaction(tx_date, description, amount, category_name, account) -> None:
-    stmt = text("""
-        INSERT INTO transactions (tx_date, description, amount, category_id, account)
-        VALUES (
-            :tx_date, :description, :amount,
-            (SELECT id FROM categories WHERE name = :cat_name LIMIT 1),
-            :account
-        )
-    """)
-
-    params = {
-        "tx_date": str(tx_date),
-        "description": description or "",
-        "amount": float(amount),
-        "cat_name": category_name,
-        "account": account or "Cash",
-    }
-
-    with get_engine().begin() as conn:   
-        conn.execute(stmt, params)
+def insert_transaction(tx_date, description, amount, category_name, account, kind: str = "expense") -> None:
+    category_id = get_category_id_by_name(category_name, kind)
+    if category_id is None:
+        raise ValueError(f"Unknown {kind} category: {category_name!r}")
+    insert_transaction_by_category_id(tx_date, description, amount, category_id, account)
 
 
 def insert_transaction_by_category_id(tx_date, description, amount, category_id, account) -> None:
     stmt = text("""
         INSERT INTO transactions (tx_date, description, amount, category_id, account)
         VALUES (:tx_date, :description, :amount, :category_id, :account)
+        RETURNING id
     """)
 
     params = {
@@ -98,4 +96,185 @@ def insert_transaction_by_category_id(tx_date, description, amount, category_id,
     }
 
     with get_engine().begin() as conn:
-        conn.execute(stmt, params)
+        tx_id = conn.execute(stmt, params).scalar_one()
+        apply_rollups(conn, _SINGLE_ROW_SOURCE, {"id": tx_id, "tx_date": params["tx_date"]})
+
+
+def summarize_between(
+    start,
+    end,
+    span_start,
+    span_end,
+    category_ids: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "start": str(start),
+        "end": str(end),
+        "span_start": str(min(start, span_start)),
+        "span_end": str(max(end, span_end)),
+    }
+    bindparams = []
+    in_range = "t.tx_date BETWEEN :start AND :end"
+    if category_ids:
+        in_range += " AND t.category_id IN :cids"
+        params["cids"] = [int(c) for c in category_ids]
+        bindparams.append(bindparam("cids", expanding=True))
+
+    sql = f"""
+        SELECT
+            COALESCE(SUM(t.total) FILTER (WHERE t.kind = 'expense' AND {in_range}), 0) AS spent,
+            COALESCE(SUM(t.total) FILTER (WHERE t.kind = 'expense'), 0)                AS span_spent,
+            COALESCE(SUM(t.total) FILTER (WHERE t.kind = 'income' AND {in_range}), 0)  AS income,
+            COALESCE(SUM(t.n) FILTER (WHERE {in_range}), 0)                            AS n
+        FROM daily_totals t
+        WHERE t.tx_date BETWEEN :span_start AND :span_end
+    """
+    stmt = text(sql).bindparams(*bindparams)
+
+    with get_engine().connect() as conn:
+        row = conn.execute(stmt, params).mappings().one()
+
+    return {
+        "spent": float(row["spent"]),
+        "span_spent": float(row["span_spent"]),
+        "income": float(row["income"]),
+        "count": int(row["n"]),
+    }
+
+
+class OccurrenceCounts:
+    # Running repeat counts for one import that arrives in several frames,
+    # keyed by a 64-bit digest of the normalised row instead of the row itself
+    # so memory stays small next to the file being imported.
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64", index=pd.Index([], dtype="uint64"))
+
+
+def _with_occurrence(df: pd.DataFrame, seen: Optional[OccurrenceCounts] = None) -> pd.DataFrame:
+    # Mirrors the normalisation in tx_fingerprint(); `seen` carries counts
+    # across calls so a file imported in several frames numbers repeats once.
+    key = pd.DataFrame({
+        "tx_date": pd.to_datetime(df["tx_date"]).dt.normalize(),
+        # Already rounded half-up to cents by validate_frame, matching NUMERIC round().
+        "amount": df["amount"],
+        "description": df["description"].fillna("").str.strip().str.lower(),
+        "account": df["account"].str.strip().str.lower(),
+        "category_id": df["category_id"],
+    })
+    occurrence = (key.groupby(list(key.columns), sort=False).cumcount() + 1).to_numpy(dtype="int64")
+    if seen is not None and len(key):
+        digest = pd.util.hash_pandas_object(key, index=False).to_numpy()
+        occurrence = occurrence + seen.counts.reindex(digest, fill_value=0).to_numpy(dtype="int64")
+        latest = pd.Series(occurrence, index=digest).groupby(level=0).max()
+        seen.counts = latest.combine_first(seen.counts).astype("int64")
+    return df.assign(occurrence=occurrence)
+
+
+def _iter_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    chunk_size = max(1, int(chunk_size))
+    for pos in range(0, len(df), chunk_size):
+        yield df.iloc[pos:pos + chunk_size]
+
+
+def _copy_chunk(conn: Connection, chunk: pd.DataFrame) -> int:
+    conn.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS import_staging (
+            tx_date     DATE NOT NULL,
+            description TEXT NOT NULL,
+            amount      NUMERIC NOT NULL,
+            category_id INTEGER NOT NULL,
+            account     TEXT NOT NULL,
+            occurrence  BIGINT NOT NULL
+        ) ON COMMIT DROP
+    """))
+    conn.execute(text("TRUNCATE import_staging"))
+
+    buf = io.StringIO()
+    chunk.to_csv(buf, columns=_STAGING_COLUMNS, index=False, header=False)
+    buf.seek(0)
+
+    cur = conn.connection.cursor()
+    try:
+        cur.copy_expert(
+            f"COPY import_staging ({', '.join(_STAGING_COLUMNS)}) FROM STDIN "
+            "WITH (FORMAT csv, FORCE_NOT_NULL (description, account))",
+            buf,
+        )
+    finally:
+        cur.close()
+
+    conn.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS import_inserted (
+            tx_date     DATE,
+            category_id INTEGER,
+            account     TEXT,
+            amount      NUMERIC
+        ) ON COMMIT DROP
+    """))
+    conn.execute(text("TRUNCATE import_inserted"))
+
+    result = conn.execute(text(f"""
+        WITH ins AS (
+            INSERT INTO transactions ({', '.join(BULK_COLUMNS)}, fingerprint)
+            SELECT {', '.join(BULK_COLUMNS)},
+                   tx_fingerprint(tx_date, amount, description, account, category_id, occurrence)
+            FROM import_staging
+            ON CONFLICT (fingerprint, tx_date) DO NOTHING
+            RETURNING tx_date, category_id, account, amount
+        )
+        INSERT INTO import_inserted SELECT * FROM ins
+    """))
+    apply_rollups(conn, "import_inserted")
+    return int(result.rowcount)
+
+
+def _bulk_frame(df: pd.DataFrame) -> pd.DataFrame:
+    return df[BULK_COLUMNS].astype({"category_id": "int64", "amount": "float64"})
+
+
+def record_occurrences(df: pd.DataFrame, seen: OccurrenceCounts) -> None:
+    # Advances `seen` exactly as inserting `df` would, without writing anything;
+    # used when a resumed import replays chunks that were already committed.
+    _with_occurrence(_bulk_frame(df), seen)
+
+
+def bulk_insert_transactions(
+    df: pd.DataFrame,
+    chunk_size: int = 5000,
+    atomic: bool = False,
+    seen: Optional[OccurrenceCounts] = None,
+    conn: Optional[Connection] = None,
+) -> int:
+    df = _with_occurrence(_bulk_frame(df), seen)
+    inserted = 0
+    if df.empty:
+        return inserted
+
+    # Historic statements would otherwise pile up in the default partition.
+    dates = pd.to_datetime(df["tx_date"])
+    lo, hi = dates.min().date(), dates.max().date()
+
+    if conn is not None:
+        # Runs inside the caller's transaction, e.g. next to a job checkpoint.
+        # That transaction may already hold locks on transactions, so DDL from
+        # a second connection would wait on it forever; create any missing
+        # partitions here instead (long atomic jobs create them up front).
+        ensure_partitions(conn, lo, hi)
+        for chunk in _iter_chunks(df, chunk_size):
+            inserted += _copy_chunk(conn, chunk)
+        return inserted
+
+    # Partition DDL locks transactions exclusively, so it gets its own short
+    # transaction rather than riding along with the (possibly long) load.
+    ensure_partitions_now(lo, hi)
+
+    if atomic:
+        with get_engine().begin() as conn:
+            for chunk in _iter_chunks(df, chunk_size):
+                inserted += _copy_chunk(conn, chunk)
+        return inserted
+
+    for chunk in _iter_chunks(df, chunk_size):
+        with get_engine().begin() as conn:
+            inserted += _copy_chunk(conn, chunk)
+    return inserted
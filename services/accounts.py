@@ -0,0 +1,12 @@
+from repos.accounts_repo import account_balances, balance_history
+from utils.cache import range_cached
+
+# Neither function takes start/end, so both are keyed on the "open" generation
+# and any write invalidates them: a running balance depends on every earlier month.
+@range_cached(ttl=30)
+def get_account_balances():
+    return account_balances()
+
+@range_cached(ttl=30)
+def get_balance_history(accounts=None, since=None, until=None):
+    return balance_history(accounts, since, until)
@@ -1,10 +1,10 @@
-from repos.categories_repo import list_categories_by_kind, insert_category, list_all_categories
+from repos.categories_repo import get_category_registry, insert_category
 
 def get_categories(kind: str) -> list[str]:
-    return list_categories_by_kind(kind)
+    return get_category_registry().names(kind)
 
 def get_all_categories() -> list[dict]:
-    return list_all_categories()
+    return get_category_registry().all()
 
 def add_category(name: str, kind: str) -> None:
-    insert_category(name, kind)
\ No newline at end of file
+    insert_category(name, kind)
@@ -0,0 +1,219 @@
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from config import IMPORT_JOB_POLL_SECONDS, IMPORT_JOB_STALE_SECONDS, PARTITION_CHECK_SECONDS, STREAM_CHUNK_ROWS
+from db.partitions import ensure_partitions_now, ensure_upcoming_partitions
+from db.conn import get_engine
+from repos.import_jobs_repo import checkpoint_job, claim_job, finish_job, insert_job, list_jobs, lock_job, requeue_job, touch_job
+from repos.transactions_repo import OccurrenceCounts
+from services.imports import coerce_frame, import_rows, replay_rows, validate_frame
+from utils.cache import bust_data_cache
+
+logger = logging.getLogger("exp_tracker.imports")
+
+# Uploaded files are copied here so a job survives the browser session and,
+# with a shared directory, the process that accepted it.
+SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "exp_tracker_imports")
+# Set when SPOOL_DIR is shared between hosts; otherwise a worker only claims
+# jobs whose files were spooled on its own host.
+SPOOL_SHARED = os.getenv("IMPORT_SPOOL_SHARED", "0") != "0"
+HOST = socket.gethostname()
+WORKER_ID = f"{HOST}:{os.getpid()}"
+
+_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+
+
+def submit_import(file_name: str, data: bytes, options: Dict[str, Any]) -> int:
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    stem = uuid.uuid4().hex
+    source_path = os.path.join(SPOOL_DIR, f"{stem}{os.path.splitext(file_name)[1].lower()}")
+    with open(source_path, "wb") as fh:
+        fh.write(data)
+    rejected_path = os.path.join(SPOOL_DIR, f"{stem}.rejected.csv")
+    job_id = insert_job(file_name, source_path, options, len(data), rejected_path, HOST)
+    start_worker()
+    return job_id
+
+
+def retry_import(job_id: int) -> bool:
+    requeued = requeue_job(job_id)
+    if requeued:
+        start_worker()
+    return requeued
+
+
+def recent_imports(limit: int = 20) -> List[Dict[str, Any]]:
+    jobs = list_jobs(limit)
+    for job in jobs:
+        elapsed = ((job["heartbeat_at"] or job["started_at"]) - job["started_at"]).total_seconds() if job["started_at"] else 0
+        job["rows_per_s"] = round(job["run_rows"] / elapsed, 1) if elapsed > 0 else None
+        job["progress"] = min(1.0, job["bytes_done"] / job["bytes_total"]) if job["bytes_total"] else 0.0
+    return jobs
+
+
+def _iter_source(
+    path: str, chunk_rows: int, usecols: Optional[List[str]] = None
+) -> Iterator[Tuple[pd.DataFrame, float]]:
+    # Yields each chunk with the fraction of the file consumed after it.
+    if path.endswith(".csv"):
+        size = os.path.getsize(path) or 1
+        with open(path, "rb") as fh:
+            for chunk in pd.read_csv(fh, chunksize=chunk_rows, usecols=usecols):
+                yield chunk, min(1.0, fh.tell() / size)
+        return
+    df = pd.read_excel(path, usecols=usecols)
+    for pos in range(0, len(df), chunk_rows):
+        yield df.iloc[pos:pos + chunk_rows], min(1.0, (pos + chunk_rows) / max(1, len(df)))
+
+
+def _source_dates(job: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+    # Reads only the date column, to size the partitions an atomic job needs.
+    opts = job["options"]
+    column = opts["mapping"].get("date")
+    if column is None:
+        return None
+    lo = hi = None
+    for raw, _ in _iter_source(job["source_path"], STREAM_CHUNK_ROWS, usecols=[column]):
+        dates = pd.to_datetime(raw[column], format=opts.get("date_format"), errors="coerce").dropna()
+        if dates.empty:
+            continue
+        lo = min(lo, dates.min()) if lo is not None else dates.min()
+        hi = max(hi, dates.max()) if hi is not None else dates.max()
+    return (lo.date(), hi.date()) if lo is not None else None
+
+
+@contextmanager
+def _heartbeat(job_id: int):
+    # Keeps the job claimed through work that commits nothing for a while:
+    # parsing a large Excel file or replaying chunks on resume.
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(IMPORT_JOB_STALE_SECONDS / 4):
+            try:
+                touch_job(job_id, WORKER_ID)
+            except Exception:
+                logger.debug("heartbeat for import job %s skipped", job_id, exc_info=True)
+
+    thread = threading.Thread(target=beat, name=f"import-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _run_job(job: Dict[str, Any]) -> None:
+    opts = job["options"]
+    seen = OccurrenceCounts()
+    rejected_header = job["rows_rejected"] == 0
+    if rejected_header and os.path.exists(job["rejected_path"]):
+        # Left over from a run whose chunks never committed.
+        os.remove(job["rejected_path"])
+
+    def process(conn) -> None:
+        nonlocal rejected_header
+        for number, (raw, consumed) in enumerate(_iter_source(job["source_path"], STREAM_CHUNK_ROWS), start=1):
+            frame = coerce_frame(raw, opts["mapping"], opts.get("date_format"), opts.get("invert_amount", False))
+            clean, rejected = validate_frame(frame, default_kind=opts.get("default_kind", "expense"))
+            if number <= job["chunks_done"]:
+                # Committed by an earlier run; only rebuild the duplicate counters.
+                replay_rows(clean, seen)
+                continue
+
+            def commit_chunk(c) -> pd.DataFrame:
+                if not lock_job(c, job["id"], WORKER_ID):
+                    raise RuntimeError("job was taken over by another worker")
+                imported, duplicates, unknown = import_rows(
+                    clean, opts.get("create_missing", True), seen=seen, conn=c
+                )
+                chunk_rejected = rejected
+                if not unknown.empty:
+                    chunk_rejected = pd.concat([rejected, frame.loc[unknown.index].assign(reason="unknown category")])
+                checkpoint_job(
+                    c, job["id"], number, len(frame), imported, duplicates, len(chunk_rejected),
+                    int(consumed * job["bytes_total"]),
+                )
+                return chunk_rejected
+
+            if conn is None:
+                with get_engine().begin() as c:
+                    rejected = commit_chunk(c)
+            else:
+                rejected = commit_chunk(conn)
+
+            if not rejected.empty:
+                rejected.to_csv(job["rejected_path"], mode="a", index=False, header=rejected_header)
+                rejected_header = False
+            if not clean.empty:
+                dates = clean["tx_date"].drop_duplicates()
+                if conn is None:
+                    bust_data_cache(dates)
+                else:
+                    touched.update(dates)
+
+    if opts.get("atomic"):
+        # All or nothing: nothing is committed until the end, so a failed job
+        # restarts from the first chunk and progress appears only once done.
+        # Invalidating before the commit would let readers re-cache old data
+        # under the new generations, so the dates are collected until then.
+        touched: set = set()
+        # Partition DDL needs ACCESS EXCLUSIVE on transactions; taking it inside
+        # the job transaction would block every reader until the job ends.
+        span = _source_dates(job)
+        if span is not None:
+            ensure_partitions_now(*span)
+        with get_engine().begin() as conn:
+            process(conn)
+        bust_data_cache(touched)
+    else:
+        process(None)
+
+
+def _work_forever() -> None:
+    partitions_checked = 0.0
+    while True:
+        # ensure_schema only runs once per process; keep the upcoming-month
+        # partitions ahead of the calendar for long-lived processes too.
+        if time.monotonic() - partitions_checked >= PARTITION_CHECK_SECONDS:
+            partitions_checked = time.monotonic()
+            try:
+                ensure_upcoming_partitions()
+            except Exception:
+                logger.exception("could not ensure upcoming partitions")
+        try:
+            job = claim_job(WORKER_ID, IMPORT_JOB_STALE_SECONDS, host=None if SPOOL_SHARED else HOST)
+        except Exception:
+            logger.exception("could not claim an import job")
+            job = None
+        if job is None:
+            time.sleep(IMPORT_JOB_POLL_SECONDS)
+            continue
+
+        logger.info("import job %s started (resuming after chunk %s)", job["id"], job["chunks_done"])
+        try:
+            with _heartbeat(job["id"]):
+                _run_job(job)
+        except Exception as e:
+            logger.exception("import job %s failed", job["id"])
+            finish_job(job["id"], WORKER_ID, error=str(e) or type(e).__name__)
+        else:
+            finish_job(job["id"], WORKER_ID)
+
+
+def start_worker() -> None:
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work_forever, name="import-worker", daemon=True)
+            _worker.start()
@@ -1,57 +1,117 @@
-from typing import Iterable
+from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
-from repos.categories_repo import get_or_create_category, get_category_id_by_name
-from repos.transactions_repo import insert_transaction_by_category_id
-
-def import_rows(rows: Iterable[dict], create_missing_categories: bool, default_kind: str = "expense"):
-
-    imported = 0
-    for r in rows:
-        kind_val = r.get("kind")
-        if kind_val is None or pd.isna(kind_val):
-            kind = default_kind
-        else:
-            kind = str(kind_val).strip().lower() or default_kind
-
-        cat_val = r.get("category")
-        if cat_val is None or pd.isna(cat_val):
-            continue
-        cat_name = str(cat_val).strip()
-        if not cat_name:
-            continue
-
-        amt_val = r.get("amount")
-        if amt_val is None or pd.isna(amt_val):
-            continue
-        try:
-            amount = float(amt_val)
-        except Exception:
-            continue
-        if amount <= 0:
-            continue
-
-        desc_val = r.get("description")
-        desc = "" if desc_val is None or pd.isna(desc_val) else str(desc_val).strip()
-
-        acct_val = r.get("account")
-        account = "Cash" if acct_val is None or pd.isna(acct_val) else str(acct_val).strip() or "Cash"
-
-        d = r.get("date")
-        if d is None or (isinstance(d, float) and pd.isna(d)):
-            continue
-        tx_date = pd.to_datetime(d, errors="coerce")
-        if pd.isna(tx_date):
-            continue
-        tx_date = tx_date.date()
-
-        if create_missing_categories:
-            cat_id = get_or_create_category(cat_name, kind)
-        else:
-            cat_id = get_category_id_by_name(cat_name, kind)
-            if cat_id is None:
-                continue
-
-        insert_transaction_by_category_id(tx_date, desc, amount, int(cat_id), account)
-        imported += 1
-
-    return imported
+from sqlalchemy.engine import Connection
+from config import IMPORT_CHUNK_SIZE
+from repos.categories_repo import get_category_ids
+from repos.transactions_repo import OccurrenceCounts, bulk_insert_transactions, record_occurrences
+
+KINDS = ("expense", "income")
+CLEAN_COLUMNS = ["tx_date", "description", "amount", "category", "kind", "account"]
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype="object")
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip().fillna("")
+
+def _round_money(s: pd.Series) -> pd.Series:
+    # NUMERIC round() in Postgres (used by tx_fingerprint) rounds half away
+    # from zero; float rounding is half-to-even on the binary value. Cents are
+    # first snapped to 6 dp so 2.675 (stored as 2.67499...) counts as a half.
+    # Amounts are positive by now, so floor(x + 0.5) is half away from zero.
+    cents = np.round(s.to_numpy(dtype="float64") * 100, 6)
+    return pd.Series(np.floor(cents + 0.5) / 100, index=s.index)
+
+def validate_frame(df: pd.DataFrame, default_kind: str = "expense") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    dates = pd.to_datetime(_column(df, "date"), errors="coerce").dt.normalize()
+    amounts = pd.to_numeric(_column(df, "amount"), errors="coerce")
+    categories = _text(_column(df, "category"))
+    kinds = _text(_column(df, "kind")).str.lower()
+    kinds = kinds.mask(kinds.eq(""), default_kind)
+
+    checks = [
+        ("invalid date", dates.isna()),
+        ("invalid amount", amounts.isna()),
+        ("amount must be positive", amounts.le(0)),
+        ("missing category", categories.eq("")),
+        ("unknown type", ~kinds.isin(KINDS)),
+    ]
+    reasons = pd.Series("", index=df.index, dtype="object")
+    bad = pd.Series(False, index=df.index)
+    for label, mask in checks:
+        mask = mask.to_numpy(dtype=bool, na_value=True)
+        reasons = reasons + np.where(mask, f"{label}; ", "")
+        bad |= mask
+
+    rejected = df.loc[bad].copy()
+    rejected["reason"] = reasons[bad].str.rstrip("; ")
+
+    good = ~bad
+    accounts = _text(_column(df, "account"))
+    clean = pd.DataFrame({
+        "tx_date": dates[good],
+        "description": _text(_column(df, "description"))[good],
+        "amount": _round_money(amounts[good].astype("float64")),
+        "category": categories[good],
+        "kind": kinds[good],
+        "account": accounts.mask(accounts.eq(""), "Cash")[good],
+    }, columns=CLEAN_COLUMNS)
+    return clean, rejected
+
+def coerce_frame(df: pd.DataFrame, mapping: dict, date_format: Optional[str], invert_amount: bool) -> pd.DataFrame:
+    rename_map = {source: field for field, source in mapping.items()}
+    df2 = df[list(rename_map)].rename(columns=rename_map)
+
+    if "date" in df2.columns:
+        df2["date"] = pd.to_datetime(df2["date"], format=date_format, errors="coerce").dt.normalize()
+
+    if "amount" in df2.columns:
+        df2["amount"] = pd.to_numeric(df2["amount"], errors="coerce")
+        if invert_amount:
+            df2["amount"] = -df2["amount"]
+
+    if "kind" in df2.columns:
+        df2["kind"] = df2["kind"].astype("string").str.strip().str.lower()
+
+    return df2.dropna(how="all")
+
+def _with_category_ids(df: pd.DataFrame, create_missing_categories: bool) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Returns (resolved, unresolved); both keep the caller's index so
+    # unresolved rows can be traced back to the source rows they came from.
+    pairs = df[["category", "kind"]].drop_duplicates().itertuples(index=False, name=None)
+    cat_ids = get_category_ids(pairs, create_missing_categories)
+    ids = pd.Series(
+        [cat_ids.get(pair) for pair in zip(df["category"], df["kind"])],
+        index=df.index,
+        dtype="Int64",
+    )
+    known = ids.notna()
+    return df[known].assign(category_id=ids[known]), df[~known]
+
+def import_rows(
+    df: pd.DataFrame,
+    create_missing_categories: bool,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    atomic: bool = False,
+    seen: Optional[OccurrenceCounts] = None,
+    conn: Optional[Connection] = None,
+) -> Tuple[int, int, pd.DataFrame]:
+    if df.empty:
+        return 0, 0, df
+
+    df, unknown = _with_category_ids(df, create_missing_categories)
+    if df.empty:
+        return 0, 0, unknown
+
+    imported = bulk_insert_transactions(df, chunk_size=chunk_size, atomic=atomic, seen=seen, conn=conn)
+    return imported, len(df) - imported, unknown
+
+def replay_rows(df: pd.DataFrame, seen: OccurrenceCounts) -> None:
+    if df.empty:
+        return
+    df, _ = _with_category_ids(df, create_missing_categories=False)
+    if not df.empty:
+        record_occurrences(df, seen)
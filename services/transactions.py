@@ -1,8 +1,10 @@
 from repos.transactions_repo import (
     sum_expenses_between,
     count_transactions_between,
+    summarize_between,
     insert_transaction,
 )
+from utils.cache import range_cached
 
 def get_monthly_expenses(start, end, category_ids=None) -> float:
     return sum_expenses_between(start, end, category_ids)
@@ -10,5 +12,9 @@ def get_monthly_expenses(start, end, category_ids=None) -> float:
 def get_monthly_transaction_count(start, end, category_ids=None) -> int:
     return count_transactions_between(start, end, category_ids)
 
-def add_transaction(tx_date, description, amount, category_name, account) -> None:
-    insert_transaction(tx_date, description, amount, category_name, account)
+@range_cached(ttl=30, range_args=("span_start", "span_end"))
+def get_period_summary(start, end, span_start, span_end, category_ids=None) -> dict:
+    return summarize_between(start, end, span_start, span_end, category_ids)
+
+def add_transaction(tx_date, description, amount, category_name, account, kind: str = "expense") -> None:
+    insert_transaction(tx_date, description, amount, category_name, account, kind)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# db.conn reads DB_URL at import time; the engine itself is only created on
+# first use, and these tests never open a connection.
+os.environ.setdefault("DB_URL", "postgresql://test@localhost/test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
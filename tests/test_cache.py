@@ -0,0 +1,107 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from utils import cache
+from utils.cache_backends import MemoryBackend
+from utils.cache_codec import decode, encode
+
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    backend = MemoryBackend(1 << 20)
+    monkeypatch.setattr(cache, "_backend", backend)
+    return backend
+
+
+def _counted():
+    calls = []
+
+    @cache.range_cached(ttl=60)
+    def fetch(start=None, end=None):
+        calls.append((start, end))
+        return len(calls)
+
+    return fetch, calls
+
+
+def test_repeat_call_is_served_from_cache():
+    fetch, calls = _counted()
+    assert fetch("2024-01-01", "2024-01-31") == 1
+    assert fetch("2024-01-01", "2024-01-31") == 1
+    assert len(calls) == 1
+
+
+def test_write_invalidates_only_overlapping_months():
+    fetch, calls = _counted()
+    fetch("2024-01-01", "2024-01-31")
+    fetch("2024-03-01", "2024-03-31")
+
+    cache.invalidate_dates([date(2024, 3, 15)])
+    fetch("2024-01-01", "2024-01-31")
+    assert len(calls) == 2
+    fetch("2024-03-01", "2024-03-31")
+    assert len(calls) == 3
+
+
+def test_multi_month_range_is_invalidated_by_any_month_inside_it():
+    fetch, calls = _counted()
+    fetch("2024-01-01", "2024-03-31")
+    cache.invalidate_dates(["2024-02-10"])
+    fetch("2024-01-01", "2024-03-31")
+    assert len(calls) == 2
+
+
+def test_open_range_is_invalidated_by_any_write():
+    fetch, calls = _counted()
+    fetch()
+    cache.invalidate_dates([date(1999, 12, 31)])
+    fetch()
+    assert len(calls) == 2
+
+
+def test_bust_data_cache_invalidates_everything():
+    fetch, calls = _counted()
+    fetch("2024-01-01", "2024-01-31")
+    fetch()
+    cache.bust_data_cache()
+    fetch("2024-01-01", "2024-01-31")
+    fetch()
+    assert len(calls) == 4
+
+
+def test_uncacheable_results_are_returned_but_not_stored():
+    calls = []
+
+    @cache.range_cached(ttl=60)
+    def fetch(start=None, end=None):
+        calls.append(1)
+        return object()
+
+    fetch("2024-01-01", "2024-01-31")
+    fetch("2024-01-01", "2024-01-31")
+    assert len(calls) == 2
+
+
+def test_codec_round_trips_frames_and_scalars():
+    frame = pd.DataFrame({
+        "tx_date": pd.to_datetime(["2024-01-02", "2024-01-03"]),
+        "amount": [1.5, 2.25],
+        "account": pd.Series(["Cash", "Card"], dtype="category"),
+    })
+    value = {"rows": frame, "next": ("2024-01-03", 7), "prev": None, "day": date(2024, 1, 2), "total": Decimal("3.75")}
+
+    restored = decode(encode(value))
+    pd.testing.assert_frame_equal(restored["rows"], frame)
+    assert restored["next"] == ("2024-01-03", 7)
+    assert restored["prev"] is None
+    assert restored["day"] == date(2024, 1, 2)
+    assert restored["total"] == Decimal("3.75")
+
+
+def test_codec_rejects_arbitrary_objects():
+    with pytest.raises(TypeError):
+        encode({"x": object()})
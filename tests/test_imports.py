@@ -0,0 +1,60 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("streamlit")
+
+from services.imports import validate_frame
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["date", "description", "amount", "category", "kind", "account"])
+
+
+def test_valid_rows_get_defaults():
+    clean, rejected = validate_frame(_frame([
+        ["2024-01-05", " Coffee ", 3.5, "Food", None, None],
+        ["2024-01-06", "Salary", 1000, "Job", "Income", "Bank"],
+    ]))
+    assert rejected.empty
+    assert list(clean["kind"]) == ["expense", "income"]
+    assert list(clean["account"]) == ["Cash", "Bank"]
+    assert list(clean["description"]) == ["Coffee", "Salary"]
+    assert clean["tx_date"].iloc[0] == pd.Timestamp("2024-01-05")
+
+
+def test_every_failed_check_is_reported():
+    clean, rejected = validate_frame(_frame([
+        ["2024-01-05", "a", 5, "Food", "expense", "Cash"],
+        ["2024-02-30", "b", 5, "Food", "expense", "Cash"],
+        ["2024-01-05", "c", "abc", "", "expense", "Cash"],
+        ["2024-01-05", "d", -5, "Food", "transfer", "Cash"],
+    ]))
+    assert list(clean["description"]) == ["a"]
+    assert list(rejected["reason"]) == [
+        "invalid date",
+        "invalid amount; missing category",
+        "amount must be positive; unknown type",
+    ]
+
+
+def test_default_kind_applies_to_blank_kinds_only():
+    clean, _ = validate_frame(_frame([
+        ["2024-01-05", "a", 5, "Job", "", "Cash"],
+        ["2024-01-05", "b", 5, "Food", "expense", "Cash"],
+    ]), default_kind="income")
+    assert list(clean["kind"]) == ["income", "expense"]
+
+
+@pytest.mark.parametrize("raw, rounded", [
+    (2.675, 2.68),
+    (1.005, 1.01),
+    (2.665, 2.67),
+    (0.005, 0.01),
+    (10.004, 10.0),
+    (12.5, 12.5),
+    (1234567.895, 1234567.9),
+])
+def test_amounts_round_half_up_to_cents(raw, rounded):
+    clean, _ = validate_frame(_frame([["2024-01-05", "a", raw, "Food", "expense", "Cash"]]))
+    assert clean["amount"].iloc[0] == rounded
@@ -0,0 +1,67 @@
+from contextlib import nullcontext
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("streamlit")
+
+from data import dataframe
+
+# (tx_date, id), newest first as the Recent tab shows them; two days hold
+# several rows so the id tiebreak is exercised.
+ROWS = [
+    ("2024-03-02", 9), ("2024-03-02", 4), ("2024-03-01", 8), ("2024-03-01", 7),
+    ("2024-03-01", 2), ("2024-02-28", 6), ("2024-02-27", 1),
+]
+
+
+class _Engine:
+    def connect(self):
+        return nullcontext(None)
+
+
+def _fake_fetch(conn, stmt, params):
+    # Applies the keyset predicate, order and limit the way Postgres would.
+    descending = "t.tx_date DESC" in str(stmt)
+    keys = [(pd.Timestamp(d), i) for d, i in ROWS]
+    if "cur_date" in params:
+        cursor = (pd.Timestamp(params["cur_date"]), params["cur_id"])
+        keys = [k for k in keys if (k < cursor if descending else k > cursor)]
+    keys = sorted(keys, reverse=descending)[:params["lim"]]
+    return pd.DataFrame({"tx_date": [d for d, _ in keys], "id": [i for _, i in keys]})
+
+
+@pytest.fixture
+def page(monkeypatch):
+    monkeypatch.setattr(dataframe, "get_engine", lambda: _Engine())
+    monkeypatch.setattr(dataframe, "_fetch_frame", _fake_fetch)
+
+    def load(cursor=None, direction="next"):
+        result = dataframe.load_page.__wrapped__(cursor=cursor, direction=direction, page_size=3)
+        return list(result["rows"]["id"]), result["prev"], result["next"]
+
+    return load
+
+
+def test_first_page_has_only_a_next_cursor(page):
+    ids, prev, nxt = page()
+    assert ids == [9, 4, 8]
+    assert prev is None
+    assert nxt == ("2024-03-01", 8)
+
+
+def test_walking_forward_and_back_returns_the_same_pages(page):
+    first = page()
+    second = page(first[2])
+    third = page(second[2])
+    assert second[0] == [7, 2, 6]
+    assert third == ([1], ("2024-02-27", 1), None)
+
+    back = page(third[1], "prev")
+    assert back == second
+    assert page(back[1], "prev") == first
+
+
+def test_unknown_direction_is_rejected(page):
+    with pytest.raises(ValueError):
+        dataframe.load_page.__wrapped__(direction="sideways")
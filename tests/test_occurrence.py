@@ -0,0 +1,49 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("streamlit")
+
+from repos.transactions_repo import OccurrenceCounts, _with_occurrence
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["tx_date", "description", "amount", "category_id", "account"])
+
+
+A = ["2024-01-05", "Coffee", 3.5, 1, "Cash"]
+B = ["2024-01-05", "Coffee", 3.5, 1, "Card"]
+C = ["2024-01-06", "Rent", 900.0, 2, "Bank"]
+
+
+def test_repeats_are_numbered_in_file_order():
+    df = _with_occurrence(_frame([A, B, A, C, A]))
+    assert list(df["occurrence"]) == [1, 1, 2, 1, 3]
+
+
+def test_numbering_ignores_case_and_surrounding_space():
+    df = _with_occurrence(_frame([A, ["2024-01-05", "  COFFEE ", 3.5, 1, "cash "]]))
+    assert list(df["occurrence"]) == [1, 2]
+
+
+def test_counts_carry_across_chunks():
+    seen = OccurrenceCounts()
+    first = _with_occurrence(_frame([A, B, A]), seen)
+    second = _with_occurrence(_frame([A, B, C]), seen)
+    third = _with_occurrence(_frame([C]), seen)
+    assert list(first["occurrence"]) == [1, 1, 2]
+    assert list(second["occurrence"]) == [3, 2, 1]
+    assert list(third["occurrence"]) == [2]
+
+
+def test_chunked_numbering_matches_a_single_pass():
+    rows = [A, B, A, C, A, B, C, C, A]
+    whole = _with_occurrence(_frame(rows))
+    seen = OccurrenceCounts()
+    chunks = [_with_occurrence(_frame(rows[i:i + 2]), seen) for i in range(0, len(rows), 2)]
+    assert list(pd.concat(chunks)["occurrence"]) == list(whole["occurrence"])
+
+
+def test_without_counts_each_call_starts_over():
+    _with_occurrence(_frame([A]))
+    assert list(_with_occurrence(_frame([A]))["occurrence"]) == [1]
@@ -1,8 +1,150 @@
-import streamlit as st
-from data.dataframe import load_df
-
-def bust_data_cache():
-    try:
-        load_df.clear()
-    except Exception:
-        st.cache_data.clear()
+import functools
+import hashlib
+import inspect
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.cache_backends import Month, backend_from_env, month_name
+from utils.cache_codec import decode, encode
+
+_lock = threading.Lock()
+_backend = None
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = backend_from_env()
+    return _backend
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _months(start, end) -> Optional[Tuple[Month, ...]]:
+    s, e = _to_date(start), _to_date(end)
+    if s is None or e is None:
+        return None
+    if s > e:
+        s, e = e, s
+    months, (y, m) = [], (s.year, s.month)
+    while (y, m) <= (e.year, e.month):
+        months.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return tuple(months)
+
+
+def _generation_names(months: Optional[Tuple[Month, ...]]) -> Tuple[str, ...]:
+    if months is None:
+        return ("epoch", "open")
+    return ("epoch",) + tuple(f"month:{month_name(m)}" for m in months)
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _count(name: str, field: str, n: int = 1) -> None:
+    with _lock:
+        _stats[name][field] += n
+
+
+def current_generation(name: str) -> int:
+    return get_backend().generations([name])[0]
+
+
+def bump_generation(name: str) -> None:
+    get_backend().bump([name])
+
+
+def range_cached(ttl: float = 30, range_args: Tuple[str, str] = ("start", "end")):
+    def decorator(fn: Callable):
+        sig = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__name__}"
+        _stats[name] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            months = _months(arguments.get(range_args[0]), arguments.get(range_args[1]))
+
+            backend = get_backend()
+            gens = backend.generations(_generation_names(months))
+            key = hashlib.sha1(repr((name, _freeze(tuple(arguments.items())), gens)).encode()).hexdigest()
+
+            blob = backend.get(key)
+            if blob is not None:
+                _count(name, "hits")
+                return decode(blob)
+            _count(name, "misses")
+            value = fn(*args, **kwargs)
+            try:
+                blob = encode(value)
+            except TypeError:
+                return value
+            backend.put(name, key, blob, ttl, months)
+            return value
+
+        wrapper.clear = lambda: bust_data_cache()
+        return wrapper
+
+    return decorator
+
+
+def _record_invalidations(dropped) -> None:
+    for name, n in dropped.items():
+        if name in _stats:
+            _count(name, "invalidations", n)
+
+
+def invalidate_dates(dates: Iterable) -> None:
+    months = {(d.year, d.month) for d in (_to_date(v) for v in dates) if d is not None}
+    if not months:
+        return
+    backend = get_backend()
+    backend.bump(["open"] + [f"month:{month_name(m)}" for m in months])
+    _record_invalidations(backend.drop(months))
+
+
+def bust_data_cache(dates: Optional[Iterable] = None) -> None:
+    if dates is not None:
+        invalidate_dates(dates)
+        return
+    backend = get_backend()
+    backend.bump(["epoch"])
+    _record_invalidations(backend.drop(None))
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    evictions = get_backend().evictions
+    rows = []
+    with _lock:
+        for name, s in _stats.items():
+            calls = s["hits"] + s["misses"]
+            rows.append({
+                "function": name,
+                **s,
+                "evictions": evictions.get(name, 0),
+                "hit_ratio": round(s["hits"] / calls, 3) if calls else None,
+            })
+    return rows
+
+
+def cache_size() -> Dict[str, int]:
+    return get_backend().size()
@@ -0,0 +1,242 @@
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+Month = Tuple[int, int]
+
+
+def month_name(month: Month) -> str:
+    return f"{month[0]:04d}-{month[1]:02d}"
+
+
+def _overlaps(entry_months: Optional[Tuple[Month, ...]], months: Optional[set]) -> bool:
+    return months is None or entry_months is None or bool(months.intersection(entry_months))
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.evictions: Counter = Counter()
+        self._entries: "OrderedDict[str, Tuple[str, float, bytes, Optional[Tuple[Month, ...]]]]" = OrderedDict()
+        self._bytes = 0
+        self._gens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            fn, expires, blob, _ = entry
+            if expires < time.time():
+                self._remove(key)
+                self.evictions[fn] += 1
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def put(self, fn: str, key: str, blob: bytes, ttl: float, months: Optional[Tuple[Month, ...]]) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (fn, time.time() + ttl, blob, months)
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes:
+                old_key = next(iter(self._entries))
+                self.evictions[self._entries[old_key][0]] += 1
+                self._remove(old_key)
+
+    def drop(self, months: Optional[set]) -> Counter:
+        dropped: Counter = Counter()
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if _overlaps(e[3], months)]:
+                dropped[self._entries[key][0]] += 1
+                self._remove(key)
+        return dropped
+
+    def generations(self, names: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._gens.get(n, 0) for n in names)
+
+    def bump(self, names: Iterable[str]) -> None:
+        with self._lock:
+            for n in names:
+                self._gens[n] = self._gens.get(n, 0) + 1
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self, key: str) -> None:
+        _, _, blob, _ = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+
+class SQLiteBackend:
+    # Shared by every process that points at the same file; generations live
+    # here too, so a write on one replica invalidates entries on all of them.
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions: Counter = Counter()
+        self._local = threading.local()
+        # Owner-only from the start; SQLite gives its -wal/-shm files the same mode.
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key      TEXT PRIMARY KEY,
+                fn       TEXT NOT NULL,
+                expires  REAL NOT NULL,
+                months   TEXT NOT NULL,
+                size     INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                value    BLOB NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.execute("CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, gen INTEGER NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._conn()
+        row = conn.execute("SELECT fn, expires, accessed, value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        fn, expires, accessed, blob = row
+        now = time.time()
+        if expires < now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.evictions[fn] += 1
+            return None
+        if now - accessed > 1.0:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return blob
+
+    def put(self, fn: str, key: str, blob: bytes, ttl: float, months: Optional[Tuple[Month, ...]]) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        tag = "*" if months is None else "|" + "|".join(month_name(m) for m in months) + "|"
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, fn, expires, months, size, accessed, value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, fn, now + ttl, tag, len(blob), now, sqlite3.Binary(blob)),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self.max_bytes:
+            victims = conn.execute("SELECT key, fn, size FROM entries ORDER BY accessed LIMIT 32").fetchall()
+            if not victims:
+                break
+            for victim_key, victim_fn, size in victims:
+                conn.execute("DELETE FROM entries WHERE key = ?", (victim_key,))
+                self.evictions[victim_fn] += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def drop(self, months: Optional[set]) -> Counter:
+        conn = self._conn()
+        if months is None:
+            where, params = "1 = 1", []
+        else:
+            names = [month_name(m) for m in months]
+            where = "months = '*' OR " + " OR ".join("months LIKE ?" for _ in names)
+            params = [f"%|{n}|%" for n in names]
+        rows = conn.execute(f"SELECT fn, COUNT(*) FROM entries WHERE {where} GROUP BY fn", params).fetchall()
+        conn.execute(f"DELETE FROM entries WHERE {where}", params)
+        return Counter(dict(rows))
+
+    def generations(self, names: Sequence[str]) -> Tuple[int, ...]:
+        placeholders = ", ".join("?" for _ in names)
+        rows = dict(self._conn().execute(
+            f"SELECT name, gen FROM generations WHERE name IN ({placeholders})", list(names)
+        ).fetchall())
+        return tuple(rows.get(n, 0) for n in names)
+
+    def bump(self, names: Iterable[str]) -> None:
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO generations (name, gen) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET gen = gen + 1",
+            [(n,) for n in names],
+        )
+
+    def size(self) -> Dict[str, int]:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size}
+
+
+class TieredBackend:
+    # A process-local LRU in front of a shared backend. Keys embed the shared
+    # generations, so the local tier can never serve an invalidated result.
+    def __init__(self, local: MemoryBackend, shared: SQLiteBackend):
+        self.local = local
+        self.shared = shared
+
+    @property
+    def evictions(self) -> Counter:
+        return self.local.evictions + self.shared.evictions
+
+    def get(self, key: str) -> Optional[bytes]:
+        blob = self.local.get(key)
+        if blob is None:
+            blob = self.shared.get(key)
+        return blob
+
+    def put(self, fn: str, key: str, blob: bytes, ttl: float, months: Optional[Tuple[Month, ...]]) -> None:
+        self.local.put(fn, key, blob, ttl, months)
+        self.shared.put(fn, key, blob, ttl, months)
+
+    def drop(self, months: Optional[set]) -> Counter:
+        self.local.drop(months)
+        return self.shared.drop(months)
+
+    def generations(self, names: Sequence[str]) -> Tuple[int, ...]:
+        return self.shared.generations(names)
+
+    def bump(self, names: Iterable[str]) -> None:
+        self.shared.bump(names)
+
+    def size(self) -> Dict[str, int]:
+        return self.shared.size()
+
+
+def _private_dir() -> str:
+    # The default lives under the shared temp directory, so it must belong to
+    # this user and be closed to everyone else before the cache trusts it.
+    path = os.path.join(tempfile.gettempdir(), f"exp_tracker-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{path} is not a private directory owned by this user; set CACHE_PATH instead.")
+    return path
+
+
+def backend_from_env():
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    max_bytes = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    if kind == "memory":
+        return MemoryBackend(max_bytes)
+    if kind == "sqlite":
+        path = os.getenv("CACHE_PATH") or os.path.join(_private_dir(), "cache.sqlite3")
+        local_bytes = int(os.getenv("CACHE_LOCAL_MAX_BYTES", str(16 * 1024 * 1024)))
+        return TieredBackend(MemoryBackend(local_bytes), SQLiteBackend(path, max_bytes))
+    raise ValueError(f"Unsupported CACHE_BACKEND: {kind!r}")
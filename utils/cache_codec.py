@@ -0,0 +1,95 @@
+import json
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Cached values are stored as a JSON header plus one Arrow IPC stream per
+# DataFrame. Unlike pickle, decoding a blob can never run code, which matters
+# once the blobs live in a file other processes can reach (CACHE_BACKEND=sqlite).
+# encode() raises TypeError for anything it can't represent; such results are
+# simply not cached.
+
+_HEADER = struct.Struct("!I")
+_FRAME = struct.Struct("!Q")
+
+
+def _frame_bytes(df: pd.DataFrame) -> bytes:
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, ValueError) as e:
+        raise TypeError(f"DataFrame is not Arrow-serialisable: {e}") from e
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _pack(value: Any, frames: List[bytes]) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return _pack(value.item(), frames)
+    if isinstance(value, pd.DataFrame):
+        frames.append(_frame_bytes(value))
+        return {"frame": len(frames) - 1}
+    if isinstance(value, (list, tuple)):
+        items = [_pack(v, frames) for v in value]
+        return {"tuple": items} if isinstance(value, tuple) else items
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError("only dicts with string keys can be cached")
+        return {"dict": {k: _pack(v, frames) for k, v in value.items()}}
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    raise TypeError(f"cannot cache a value of type {type(value).__name__}")
+
+
+def _unpack(value: Any, frames: List[pd.DataFrame]) -> Any:
+    if isinstance(value, list):
+        return [_unpack(v, frames) for v in value]
+    if not isinstance(value, dict):
+        return value
+    (tag, payload), = value.items()
+    if tag == "frame":
+        return frames[payload]
+    if tag == "tuple":
+        return tuple(_unpack(v, frames) for v in payload)
+    if tag == "dict":
+        return {k: _unpack(v, frames) for k, v in payload.items()}
+    if tag == "datetime":
+        return datetime.fromisoformat(payload)
+    if tag == "date":
+        return date.fromisoformat(payload)
+    if tag == "decimal":
+        return Decimal(payload)
+    raise ValueError(f"unknown cache tag {tag!r}")
+
+
+def encode(value: Any) -> bytes:
+    frames: List[bytes] = []
+    header = json.dumps(_pack(value, frames)).encode()
+    parts = [_HEADER.pack(len(header)), header]
+    for frame in frames:
+        parts += [_FRAME.pack(len(frame)), frame]
+    return b"".join(parts)
+
+
+def decode(blob: bytes) -> Any:
+    (size,) = _HEADER.unpack_from(blob)
+    pos = _HEADER.size + size
+    header = json.loads(blob[_HEADER.size:pos])
+    frames = []
+    while pos < len(blob):
+        (size,) = _FRAME.unpack_from(blob, pos)
+        pos += _FRAME.size
+        frames.append(pa.ipc.open_stream(pa.py_buffer(blob[pos:pos + size])).read_all().to_pandas())
+        pos += size
+    return _unpack(header, frames)
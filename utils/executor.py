@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from db.pool import POOL_SIZE
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+# Leave half the pool for queries that sessions run directly.
+QUERY_WORKERS = max(1, POOL_SIZE // 2)
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="query")
+    return _executor
+
+
+def _with_ctx(fn: Callable[[], Any]) -> Callable[[], Any]:
+    if get_script_run_ctx is None:
+        return fn
+    ctx = get_script_run_ctx()
+
+    def run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    return run
+
+
+def run_concurrently(**calls: Callable[[], Any]) -> Dict[str, Tuple[Any, Optional[Exception]]]:
+    executor = get_executor()
+    futures = {name: executor.submit(_with_ctx(fn)) for name, fn in calls.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = (future.result(), None)
+        except Exception as e:
+            results[name] = (None, e)
+    return results
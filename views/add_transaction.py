@@ -3,6 +3,7 @@ from services.categories import get_categories, add_category
 from services.transactions import add_transaction
 from utils.cache import bust_data_cache
 
+@st.fragment
 def render_add_transaction():
     pending = st.session_state.pop("pending_kind_switch", None)
     if pending is not None:
@@ -43,10 +44,10 @@ def render_add_transaction():
             st.warning(f"No {selected_kind} categories selected. Please add one below first.")
         else:
             try:
-                add_transaction(dp, desc, amount, category, account)
+                add_transaction(dp, desc, amount, category, account, selected_kind)
                 st.success("Transaction added!")
-                bust_data_cache()
-                st.rerun()
+                bust_data_cache([dp])
+                st.rerun(scope="fragment")
             except Exception as e:
                 st.error(f"Error adding transaction: {e}")
 
@@ -68,6 +69,7 @@ def render_add_transaction():
                 add_category(name, new_kind)
                 st.session_state["pending_kind_switch"] = new_kind  
                 st.session_state["just_added_cat"] = name           
+                # Full rerun: the sidebar category filter has to pick up the new name.
                 st.rerun()
             except Exception as e:
                 st.error(f"Error adding category: {e}")
@@ -0,0 +1,77 @@
+import pandas as pd
+import streamlit as st
+from data.snapshot import ANALYTICS_MODE, snapshot_status
+from db.conn import get_engine
+from db.instrumentation import ENABLED as INSTRUMENTATION_ENABLED, SLOW_QUERY_MS, overhead_stats, query_stats, reset_stats
+from db.pool import pool_metrics, pool_wait_stats, reset_pool_stats
+from utils.cache import cache_size, cache_stats
+
+def _render_cache():
+    st.markdown("**Cache**")
+    stats = pd.DataFrame(cache_stats())
+    if stats.empty:
+        st.caption("No cached functions registered.")
+    else:
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+    size = cache_size()
+    st.caption(f"{size['entries']} entr{'y' if size['entries'] == 1 else 'ies'}, {size['bytes'] / 1024:,.0f} KiB")
+
+def _render_queries():
+    st.markdown("**Queries**")
+    if not INSTRUMENTATION_ENABLED:
+        st.caption("Query instrumentation is off (SQL_INSTRUMENTATION=0).")
+        return
+
+    stats = pd.DataFrame(query_stats())
+    if stats.empty:
+        st.caption("No queries recorded yet.")
+    else:
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+
+    overhead = overhead_stats()
+    st.caption(
+        f"Slow-query threshold {SLOW_QUERY_MS:g} ms. "
+        f"Instrumentation overhead {overhead['per_statement_us']} µs/statement."
+    )
+    if st.button("Reset query stats", key="reset_query_stats"):
+        reset_stats()
+        st.rerun()
+
+def _render_pool():
+    st.markdown("**Connection pool**")
+    metrics = pool_metrics(get_engine())
+    waits = pool_wait_stats()
+    st.caption(
+        f"Mode {metrics['mode']}: {metrics['checked_out']} checked out, {metrics['idle']} idle, "
+        f"{metrics['overflow']} overflow of {metrics['size']}. "
+        f"Churn: {metrics['connects']} connect(s), {metrics['closes']} close(s), {metrics['invalidations']} invalidation(s)."
+    )
+    st.caption(
+        f"Checkout wait p50 {waits['p50_ms']} ms · p95 {waits['p95_ms']} ms · max {waits['max_ms']} ms "
+        f"over {waits['checkouts']} checkout(s)."
+    )
+    st.caption("Wait histogram: " + " · ".join(f"{label} {n}" for label, n in metrics["wait_histogram"].items()))
+    if st.button("Reset pool stats", key="reset_pool_stats"):
+        reset_pool_stats()
+        st.rerun()
+
+def _render_snapshot():
+    st.markdown("**Analytics snapshot**")
+    if ANALYTICS_MODE != "snapshot":
+        st.caption("Stats read from Postgres (ANALYTICS_MODE=postgres).")
+        return
+    # Checking freshness queries the database, so only do it when asked.
+    if not st.button("Check snapshot", key="check_snapshot"):
+        return
+    status = snapshot_status()
+    if not status["available"]:
+        st.caption("No snapshot yet; stats read from Postgres until the first refresh finishes.")
+        return
+    state = "fresh" if status["fresh"] else "stale, falling back to Postgres"
+    st.caption(f"{status['rows']:,} row(s) up to id {status['watermark']}, refreshed {status['age_s']:,.0f} s ago ({state}).")
+
+def render_diagnostics():
+    _render_cache()
+    _render_queries()
+    _render_pool()
+    _render_snapshot()
@@ -1,7 +1,9 @@
+import os
 import pandas as pd
 import streamlit as st
-from services.imports import import_rows
-from data.dataframe import load_df  
+from config import STREAM_CHUNK_ROWS, STREAM_THRESHOLD_BYTES
+from services.import_jobs import recent_imports, retry_import, submit_import
+from services.imports import coerce_frame, validate_frame
 
 REQUIRED_FIELDS = ["date", "amount", "category"]
 OPTIONAL_FIELDS = ["description", "account", "kind"]
@@ -34,50 +36,14 @@ def _parse_file(upload) -> pd.DataFrame | None:
     st.error("Unsupported file type. Upload a CSV or Excel file.")
     return None
 
-def _coerce_dataframe(df: pd.DataFrame, mapping: dict, date_format: str | None, invert_amount: bool):
-    df2 = df.copy()
+def _iter_csv_chunks(upload, chunk_rows: int = STREAM_CHUNK_ROWS):
+    upload.seek(0)
+    yield from pd.read_csv(upload, chunksize=chunk_rows)
 
-    rename_map = {mapping[k]: k for k in mapping}
-    df2 = df2.rename(columns=rename_map)
-
-    keep = [c for c in (REQUIRED_FIELDS + OPTIONAL_FIELDS) if c in df2.columns]
-    df2 = df2[keep]
-
-    if "date" in df2.columns:
-        df2["date"] = pd.to_datetime(df2["date"], format=date_format, errors="coerce").dt.date
-
-    if "amount" in df2.columns:
-        df2["amount"] = pd.to_numeric(df2["amount"], errors="coerce")
-        if invert_amount:
-            df2["amount"] = -df2["amount"]
-
-    if "kind" in df2.columns:
-        df2["kind"] = df2["kind"].astype(str).str.strip().str.lower()
-        df2["kind"] = df2["kind"].where(df2["kind"].isin(["expense", "income"]), "expense")
-    else:
-        df2["kind"] = "expense"
-
-    # Defaults
-    if "account" in df2.columns:
-        df2["account"] = df2["account"].fillna("Cash")
-    else:
-        df2["account"] = "Cash"
-
-    if "description" not in df2.columns:
-        df2["description"] = ""
-
-    df2 = df2.dropna(how="all")
-
-    errors = []
-    if df2["date"].isna().any():
-        errors.append("Some dates could not be parsed.")
-    if df2["amount"].isna().any():
-        errors.append("Some amounts are missing or invalid.")
-    if "category" not in df2.columns or df2["category"].isna().any():
-        errors.append("Some categories are missing.")
-
-    return df2, errors
+def _first_csv_chunk(upload, chunk_rows: int = STREAM_CHUNK_ROWS) -> pd.DataFrame:
+    return next(_iter_csv_chunks(upload, chunk_rows), pd.DataFrame())
 
+@st.fragment
 def render_imports():
     st.subheader("Import transactions")
     st.caption("Upload a CSV or Excel, map columns, preview, and import.")
@@ -89,8 +55,15 @@ def render_imports():
             st.code("date,description,amount,category,account,kind\n2025-09-01,Coffee,3.5,Food,Cash,expense\n", language="csv")
         return
 
+    is_csv = upload.name.lower().endswith(".csv")
+    streaming = is_csv and st.checkbox(
+        "Stream file in chunks",
+        value=(upload.size or 0) > STREAM_THRESHOLD_BYTES,
+        help="Read only the first chunk for the preview to keep memory bounded. The import job always works chunk by chunk.",
+    )
+
     try:
-        raw_df = _parse_file(upload)
+        raw_df = _first_csv_chunk(upload) if streaming else _parse_file(upload)
     except Exception as e:
         st.error(f"Could not read file: {e}")
         return
@@ -130,34 +103,84 @@ def render_imports():
     with opt_col2:
         invert_amount = st.checkbox("Invert amount sign", value=False)
     create_missing = st.checkbox("Create missing categories", value=True)
-    default_kind = st.radio("Default type for new categories", ["expense", "income"], horizontal=True, index=0)
+    atomic = not streaming and st.checkbox("All or nothing", value=False, help="Roll back the whole import if any batch fails.")
+    default_kind = st.radio("Default type when none is given", ["expense", "income"], horizontal=True, index=0)
 
     try:
-        norm_df, errors = _coerce_dataframe(raw_df, mapping, date_format or None, invert_amount)
+        norm_df = coerce_frame(raw_df, mapping, date_format or None, invert_amount)
+        clean_df, rejected_df = validate_frame(norm_df, default_kind=default_kind)
     except Exception as e:
         st.error(f"Error normalizing file: {e}")
         return
 
-    if errors:
-        for err in errors:
-            st.error(err)
+    if not rejected_df.empty:
+        scope = " in the first chunk" if streaming else ""
+        st.error(f"{len(rejected_df)} row(s){scope} failed validation and will be skipped.")
+        st.dataframe(rejected_df.head(20), use_container_width=True)
+        st.download_button(
+            "⬇️ Download rejected rows",
+            data=rejected_df.to_csv(index=False).encode("utf-8"),
+            file_name="rejected_rows.csv",
+            mime="text/csv",
+            key="dl_rejected",
+        )
 
     st.markdown("**Preview (first 20)**")
-    st.dataframe(norm_df.head(20), use_container_width=True)
+    st.dataframe(clean_df.head(20), use_container_width=True)
 
-    total_rows = len(norm_df)
-    if total_rows == 0:
-        st.info("Nothing to import.")
-        return
+    scope = "Rows in the first chunk look" if streaming else f"{len(clean_df)} row(s) look"
+    st.caption(f"{scope} valid. The import runs as a background job in committed chunks and resumes after a failure.")
 
-    if st.button(f"Import {total_rows} row(s)"):
+    if st.button("Queue import", key="queue_import"):
         try:
-            rows = norm_df.to_dict(orient="records")
-            imported = import_rows(rows, create_missing_categories=create_missing, default_kind=default_kind)
-            st.success(f"Imported {imported} of {total_rows} row(s).")
-            try:
-                load_df.clear()
-            except Exception:
-                st.cache_data.clear()
+            job_id = submit_import(upload.name, upload.getvalue(), {
+                "mapping": mapping,
+                "date_format": date_format or None,
+                "invert_amount": invert_amount,
+                "create_missing": create_missing,
+                "default_kind": default_kind,
+                "atomic": atomic,
+            })
+            st.success(f"Import job #{job_id} queued.")
         except Exception as e:
-            st.error(f"Import failed: {e}")
+            st.error(f"Could not queue import: {e}")
+
+def _render_job(job: dict):
+    status = job["status"]
+    label = f"#{job['id']} {job['file_name']} — {status}"
+    if status == "running":
+        st.progress(job["progress"], text=label)
+    else:
+        st.markdown(f"**{label}**")
+
+    rate = f", {job['rows_per_s']:,.0f} rows/s" if status == "running" and job["rows_per_s"] else ""
+    st.caption(
+        f"Read {job['rows_read']:,} row(s), imported {job['rows_imported']:,}, "
+        f"skipped {job['rows_duplicate']:,} duplicate(s), rejected {job['rows_rejected']:,}{rate}."
+    )
+    if job["error"]:
+        st.error(f"Failed after chunk {job['chunks_done']}: {job['error']}")
+        if st.button("Resume", key=f"resume_job_{job['id']}"):
+            retry_import(job["id"])
+    if job["rows_rejected"] and job["rejected_path"] and os.path.exists(job["rejected_path"]):
+        with open(job["rejected_path"], "rb") as fh:
+            st.download_button(
+                "⬇️ Download rejected rows",
+                data=fh,
+                file_name=f"rejected_rows_{job['id']}.csv",
+                mime="text/csv",
+                key=f"dl_job_rejected_{job['id']}",
+            )
+
+@st.fragment(run_every=2)
+def render_import_jobs():
+    try:
+        jobs = recent_imports(limit=10)
+    except Exception as e:
+        st.error(f"Error loading import jobs: {e}")
+        return
+    if not jobs:
+        return
+    st.markdown("**Import jobs**")
+    for job in jobs:
+        _render_job(job)
@@ -1,7 +1,18 @@
-import io
+import os
+import tempfile
 import pandas as pd
 import streamlit as st
-from data.dataframe import load_df
+from data.dataframe import load_page, estimate_count
+from data.exports import write_csv, write_xlsx
+from data.search import search_transactions
+from utils.executor import run_concurrently
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+EXPORT_FORMATS = {
+    "csv": ("CSV", write_csv, "transactions.csv", "text/csv"),
+    "xlsx": ("Excel", write_xlsx, "transactions.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
 
 def _prep_display_df(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -18,61 +29,99 @@ def _prep_display_df(df: pd.DataFrame) -> pd.DataFrame:
         "created_at": "Created At",
     })
 
-def _make_excel_friendly(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    for col in out.select_dtypes(include=["datetimetz"]).columns:
-        out[col] = out[col].dt.tz_localize(None)
-    for col in out.columns:
-        if out[col].dtype == "object":
-            conv = pd.to_datetime(out[col], utc=True)
-            if pd.api.types.is_datetime64tz_dtype(conv):
-                out[col] = conv.dt.tz_localize(None)
-    return out
-
-def _df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8")
-
-def _df_to_excel_bytes(df: pd.DataFrame, engine: str) -> bytes:
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine=engine) as writer:
-        df.to_excel(writer, index=False, sheet_name="Transactions")
-    buf.seek(0)
-    return buf.getvalue()
+def _render_exports(start, end, category_ids):
+    # The file is handed to the download button in the same run that wrote it
+    # and removed straight away, so nothing is left on disk and a new click
+    # always exports current data. The button still copies the file into
+    # Streamlit's media store (memory) for the session; hence EXPORT_MAX_ROWS.
+    cols = st.columns(len(EXPORT_FORMATS))
+    for col, (fmt, (label, writer, file_name, mime)) in zip(cols, EXPORT_FORMATS.items()):
+        with col:
+            if not st.button(f"Prepare {label} export", key=f"prep_{fmt}"):
+                continue
+            path = None
+            try:
+                fd, path = tempfile.mkstemp(prefix="transactions_", suffix=f".{fmt}")
+                os.close(fd)
+                with st.spinner(f"Exporting {label}…"):
+                    rows = writer(path, start, end, category_ids)
+                with open(path, "rb") as fh:
+                    st.download_button(
+                        f"⬇️ Download {label} ({rows:,} rows)",
+                        data=fh,
+                        file_name=file_name,
+                        mime=mime,
+                        key=f"dl_{fmt}",
+                    )
+            except Exception as e:
+                st.caption(f"{label} export unavailable: {e}")
+            finally:
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
 
+@st.fragment
 def render_recent(start=None, end=None, category_ids=None):
     try:
-        df = load_df(start=start, end=end, category_ids=category_ids)
-        if df is None or df.empty:
-            st.info("No transactions found for the selected filters.")
-            return
+        filters_key = (str(start), str(end), tuple(category_ids or ()))
+        state = st.session_state.get("recent_page")
+        if state is None or state["filters"] != filters_key:
+            state = {"filters": filters_key, "cursor": None, "direction": "next", "number": 1}
+            st.session_state["recent_page"] = state
 
-        display_df = _prep_display_df(df)
+        search_col, size_col = st.columns([3, 1])
+        with search_col:
+            query = st.text_input(
+                "Search descriptions",
+                key="recent_search",
+                placeholder='e.g. coffee, "gas station", -refund',
+            ).strip()
+        with size_col:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key="recent_page_size")
 
-        st.download_button(
-            "⬇️ Download CSV",
-            data=_df_to_csv_bytes(display_df),
-            file_name="transactions.csv",
-            mime="text/csv",
-            key="dl_csv",
+        if query:
+            results = search_transactions(query, start, end, filters_key[2], limit=page_size)
+            if results.empty:
+                st.info(f"No transactions match “{query}”.")
+            else:
+                st.caption(f"Top {len(results)} match(es), best first.")
+                st.dataframe(_prep_display_df(results))
+            return
+
+        results = run_concurrently(
+            page=lambda: load_page(
+                start=start,
+                end=end,
+                category_ids=filters_key[2],
+                cursor=state["cursor"],
+                direction=state["direction"],
+                page_size=page_size,
+            ),
+            total=lambda: estimate_count(start=start, end=end, category_ids=filters_key[2]),
         )
+        page, page_error = results["page"]
+        if page_error is not None:
+            raise page_error
+        if page["rows"].empty and state["cursor"] is None:
+            st.info("No transactions found for the selected filters.")
+            return
 
-        engine = "openpyxl"
-        if engine:
-            try:
-                excel_df = _make_excel_friendly(display_df)
-                st.download_button(
-                    "⬇️ Download Excel",
-                    data=_df_to_excel_bytes(excel_df, engine),
-                    file_name="transactions.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="dl_xlsx",
-                )
-            except Exception as e:
-                st.caption(f"Excel export unavailable: {e}")
-        else:
-            st.caption("Excel export unavailable: install 'openpyxl' or 'XlsxWriter'.")
+        _render_exports(start, end, filters_key[2])
+
+        st.dataframe(_prep_display_df(page["rows"]))
 
-        st.dataframe(display_df)
+        total, _ = results["total"]
+        nav_prev, nav_info, nav_next = st.columns([1, 3, 1])
+        with nav_prev:
+            if st.button("← Newer", disabled=page["prev"] is None, key="recent_prev"):
+                state.update(cursor=page["prev"], direction="prev", number=state["number"] - 1)
+                st.rerun(scope="fragment")
+        with nav_info:
+            estimate = f" · about {total:,} transaction(s)" if total is not None else ""
+            st.caption(f"Page {state['number']}{estimate}")
+        with nav_next:
+            if st.button("Older →", disabled=page["next"] is None, key="recent_next"):
+                state.update(cursor=page["next"], direction="next", number=state["number"] + 1)
+                st.rerun(scope="fragment")
 
     except Exception as e:
         st.error(f"Error fetching transactions: {e}")
@@ -1,13 +1,11 @@
 import streamlit as st
 from datetime import date
 from dateutil.relativedelta import relativedelta
-from data.dataframe import load_df
-from services.transactions import (
-    get_monthly_expenses,          
-    get_monthly_transaction_count, 
-)
+from data.aggregates import load_category_totals, load_period_totals
+from services.accounts import get_account_balances, get_balance_history
+from services.transactions import get_period_summary
+from utils.executor import run_concurrently
 import plotly.express as px
-import pandas as pd
 
 def _month_span(any_start: date, any_end: date):
     if any_start > any_end:
@@ -24,8 +22,20 @@ def _format_daterange(a: date, b: date) -> str:
 
 def render_stats(start: date, end: date, monthly_budget: float, category_ids=None):
     try:
-        df = load_df(start=start, end=end, category_ids=category_ids)
-        if df is None or df.empty:
+        cids = tuple(category_ids or ())
+        span_start, span_end, months_count = _month_span(start, end)
+        results = run_concurrently(
+            summary=lambda: get_period_summary(start, end, span_start, span_end, cids),
+            by_category=lambda: load_category_totals(start, end, cids),
+            weekly=lambda: load_period_totals(start, end, cids, grain="week"),
+            monthly=lambda: load_period_totals(date(end.year - 2, 1, 1), end, cids, grain="month"),
+            balances=get_account_balances,
+            balance_history=lambda: get_balance_history(until=end),
+        )
+        summary, summary_error = results["summary"]
+        if summary_error is not None:
+            raise summary_error
+        if summary["count"] == 0:
             st.info("No transactions found for the selected filters.")
             return
 
@@ -34,20 +44,11 @@ def render_stats(start: date, end: date, monthly_budget: float, category_ids=Non
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            try:
-                total_spent_filtered = get_monthly_expenses(start, end, category_ids)
-                st.metric(f"Total Spent ({_format_daterange(start, end)})", f"${total_spent_filtered:,.2f}")
-            except Exception as e:
-                st.error(f"Error calculating total spent: {e}")
+            st.metric(f"Total Spent ({_format_daterange(start, end)})", f"${summary['spent']:,.2f}")
 
         with col2:
-            span_start, span_end, months_count = _month_span(start, end)
             total_budget = monthly_budget * months_count
-            try:
-                spent_unfiltered_span = get_monthly_expenses(span_start, span_end, category_ids=None)
-            except Exception as e:
-                st.warning(f"Could not compute unfiltered monthly spend: {e}")
-                spent_unfiltered_span = 0.0
+            spent_unfiltered_span = summary["span_spent"]
 
             percent = (spent_unfiltered_span / total_budget) if total_budget > 0 else 0.0
             st.metric(
@@ -57,23 +58,16 @@ def render_stats(start: date, end: date, monthly_budget: float, category_ids=Non
             st.progress(min(1.0, percent), text=f"{percent*100:.1f}% of budget used")
 
         with col3:
-            try:
-                total_tx = get_monthly_transaction_count(start, end, category_ids)
-                st.metric(f"Total Transactions ({_format_daterange(start, end)})", total_tx)
-            except Exception as e:
-                st.warning(f"Could not fetch transaction count: {e}")
+            st.metric(f"Total Transactions ({_format_daterange(start, end)})", summary["count"])
 
         
         chart_col1, chart_col2 = st.columns(2)
         with chart_col1:
-            cat_df = (
-                df[df["category_kind"] == "expense"]
-                .groupby("category", as_index=False)["amount"]
-                .sum()
-                .sort_values("amount", ascending=False)
-            )
+            cat_df, cat_error = results["by_category"]
 
-            if cat_df.empty:
+            if cat_error is not None:
+                st.error(f"Error loading expenses by category: {cat_error}")
+            elif cat_df.empty:
                 st.info("No expenses found for this period.")
             else:
                 fig = px.bar(
@@ -91,32 +85,72 @@ def render_stats(start: date, end: date, monthly_budget: float, category_ids=Non
                 st.plotly_chart(fig, use_container_width=True)
         
         with chart_col2:
-            if df.empty:
-                st.info("No data available for the selected period.")
+            weekly_df, weekly_error = results["weekly"]
+
+            if weekly_error is not None:
+                st.error(f"Error loading weekly expenses: {weekly_error}")
+            elif weekly_df.empty:
+                st.info("No expenses found.")
             else:
-                df["tx_date"] = pd.to_datetime(df["tx_date"], errors="coerce")
-
-                weekly_df = (
-                    df[df["category_kind"] == "expense"]
-                    .groupby(pd.Grouper(key="tx_date", freq="W"))["amount"]
-                    .sum()
-                    .reset_index()
-                    .sort_values("tx_date")
+                fig = px.line(
+                    weekly_df,
+                    x="period",
+                    y="amount",
+                    labels={"period": "Week", "amount": "Amount Spent"},
+                    title="Weekly Expenses",
                 )
+                fig.update_traces(mode="lines+markers", line=dict(width=2))
+                fig.update_yaxes(tickprefix="$")
+                st.plotly_chart(fig, use_container_width=True)
+
+        monthly_df, monthly_error = results["monthly"]
+        if monthly_error is not None:
+            st.error(f"Error loading year-over-year expenses: {monthly_error}")
+        elif not monthly_df.empty:
+            yoy_df = monthly_df.assign(
+                year=monthly_df["period"].dt.year.astype(str),
+                month=monthly_df["period"].dt.strftime("%b"),
+            )
+            fig = px.line(
+                yoy_df,
+                x="month",
+                y="amount",
+                color="year",
+                labels={"month": "Month", "amount": "Amount Spent", "year": "Year"},
+                title="Year over Year",
+            )
+            fig.update_traces(mode="lines+markers", line=dict(width=2))
+            fig.update_xaxes(categoryorder="array", categoryarray=[date(2000, m, 1).strftime("%b") for m in range(1, 13)])
+            fig.update_yaxes(tickprefix="$")
+            st.plotly_chart(fig, use_container_width=True)
 
-                if weekly_df.empty:
-                    st.info("No expenses found.")
-                else:
-                    fig = px.line(
-                        weekly_df,
-                        x="tx_date",
-                        y="amount",
-                        labels={"tx_date": "Week", "amount": "Amount Spent"},
-                        title="Weekly Expenses",
-                    )
-                    fig.update_traces(mode="lines+markers", line=dict(width=2))
-                    fig.update_yaxes(tickprefix="$")
-                    st.plotly_chart(fig, use_container_width=True)
+        st.subheader("Account Balances")
+        balances_df, balances_error = results["balances"]
+        history_df, history_error = results["balance_history"]
+        if balances_error is not None:
+            st.error(f"Error loading balances: {balances_error}")
+        elif balances_df.empty:
+            st.info("No accounts yet.")
+        else:
+            cols = st.columns(min(4, len(balances_df)))
+            for i, row in enumerate(balances_df.itertuples(index=False)):
+                with cols[i % len(cols)]:
+                    st.metric(row.account, f"${row.balance:,.2f}")
+
+        if history_error is not None:
+            st.error(f"Error loading balance history: {history_error}")
+        elif not history_df.empty:
+            fig = px.line(
+                history_df,
+                x="month",
+                y="balance",
+                color="account",
+                line_shape="hv",
+                labels={"month": "Month", "balance": "Balance", "account": "Account"},
+                title="Balance over Time",
+            )
+            fig.update_yaxes(tickprefix="$")
+            st.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
         st.error(f"Error loading stats: {e}")